@@ -4,6 +4,8 @@
 
 from typing import List, Dict, Optional, Tuple
 
+import numpy as np
+
 QUALITY_INDEX = {
     "P": 0, "C": 1, "F": 2, "X": 3, "E": 4, "Y": 5
 }
@@ -12,7 +14,63 @@ QUALITY_LABELS = {
     0: "P", 1: "C", 2: "F", 3: "X", 4: "E", 5: "Y"
 }
 
-def compute_deviation_signature(qualities: List[str], template_index: Optional[int] = None) -> Dict:
+SIGNATURE_FIELDS = (
+    "signature", "Q_shift", "Q_anchor", "Q_max", "Q_values", "labels", "template_index", "uniform"
+)
+
+
+class DeviationSignature:
+    """
+    Immutable deviation signature shared by every call with the same inputs.
+    Fields are readable as attributes or, like the former dict result, by key.
+    """
+    __slots__ = SIGNATURE_FIELDS
+
+    def __init__(self, qualities: Tuple[str, ...], template_index: Optional[int] = None):
+        Q_values = tuple(QUALITY_INDEX[q] for q in qualities)
+        Q_anchor = min(Q_values)
+        deviations = [q - Q_anchor for q in Q_values]
+
+        if template_index is not None:
+            dev_template = deviations.pop(template_index)
+            deviations.append(dev_template)
+
+        values = (tuple(deviations), Q_anchor, Q_anchor, max(Q_values), Q_values, qualities,
+                  template_index, all(q == Q_anchor for q in Q_values))
+        for field, value in zip(SIGNATURE_FIELDS, values):
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DeviationSignature is immutable")
+
+    def __getitem__(self, key: str):
+        if key not in SIGNATURE_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in SIGNATURE_FIELDS else default
+
+    def keys(self):
+        return SIGNATURE_FIELDS
+
+    def to_dict(self) -> Dict:
+        """Return the signature in the original dict form (fresh, mutable lists)."""
+        result = {field: getattr(self, field) for field in SIGNATURE_FIELDS}
+        result["Q_values"] = list(self.Q_values)
+        result["labels"] = list(self.labels)
+        return result
+
+    def __repr__(self):
+        return f"DeviationSignature(labels={self.labels!r}, template_index={self.template_index!r})"
+
+
+# Interned signatures keyed by (labels, template_index); the domain is at most
+# 6^5 label tuples times a handful of template slots.
+_SIGNATURES: Dict[Tuple[Tuple[str, ...], Optional[int]], DeviationSignature] = {}
+
+
+def compute_deviation_signature(qualities: List[str], template_index: Optional[int] = None) -> DeviationSignature:
     """
     Computes a normalized deviation signature from material quality labels.
 
@@ -21,35 +79,52 @@ def compute_deviation_signature(qualities: List[str], template_index: Optional[i
         template_index (Optional[int]): Index of template material if present
 
     Returns:
-        Dict with:
+        Shared DeviationSignature with:
             - "signature": Tuple[int, ...] with last element = template deviation
             - "Q_shift": int original anchor (used for restoration or expansion)
             - "Q_anchor": int minimum Q value in original input
             - "Q_max": int maximum Q value in original input
-            - "Q_values": List[int] of raw Q inputs
-            - "labels": List[str] identical to input
+            - "Q_values": Tuple[int, ...] of raw Q inputs
+            - "labels": Tuple[str, ...] identical to input
             - "template_index": index of template (unchanged)
             - "uniform": bool whether all inputs are same Q
     """
-    Q_values = [QUALITY_INDEX[q] for q in qualities]
-    Q_anchor = min(Q_values)
-    Q_shift = Q_anchor
-    Q_max = max(Q_values)
-    uniform = all(q == Q_anchor for q in Q_values)
+    key = (tuple(qualities), template_index)
+    signature = _SIGNATURES.get(key)
+    if signature is None:
+        signature = _SIGNATURES[key] = DeviationSignature(key[0], template_index)
+    return signature
+
+
+def compute_deviation_signatures(q_values: np.ndarray, template_indices: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Batch compute_deviation_signature over N inputs of k materials each.
+
+    Parameters:
+        q_values (ndarray[N, k]): Tier indices (QUALITY_INDEX values)
+        template_indices (ndarray[N] | None): Template position per row, -1 for none
 
-    deviations = [q - Q_anchor for q in Q_values]
+    Returns:
+        Dict with "signature" (ndarray[N, k], template deviation last), "Q_anchor",
+        "Q_max" (ndarray[N]) and "uniform" (bool ndarray[N])
+    """
+    q_values = np.asarray(q_values, dtype=np.int64)
+    n, k = q_values.shape
+    Q_anchor = q_values.min(axis=1)
+    Q_max = q_values.max(axis=1)
+    deviations = q_values - Q_anchor[:, None]
 
-    if template_index is not None:
-        dev_template = deviations.pop(template_index)
-        deviations.append(dev_template)
+    if template_indices is not None:
+        # Stable reorder that moves each row's template column to the end
+        positions = np.arange(k)
+        template_indices = np.asarray(template_indices, dtype=np.int64)
+        order_key = np.where(positions == template_indices[:, None], k, positions)
+        order = np.argsort(order_key, axis=1, kind="stable")
+        deviations = np.take_along_axis(deviations, order, axis=1)
 
     return {
-        "signature": tuple(deviations),
-        "Q_shift": Q_shift,
+        "signature": deviations,
         "Q_anchor": Q_anchor,
         "Q_max": Q_max,
-        "Q_values": Q_values,
-        "labels": qualities,
-        "template_index": template_index,
-        "uniform": uniform
+        "uniform": Q_anchor == Q_max
     }
@@ -1,15 +1,75 @@
 
+import argparse
 import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 # Canonical tier order
 TIERS = ["P", "C", "F", "X", "E", "Y"]
 
+READ_CHUNK_SIZE = 1 << 16
+DEFAULT_SHARD_SIZE = 1000
+
 def recipe_to_indices(recipe):
     return [TIERS.index(ch) for ch in recipe]
 
 def indices_to_recipe(indices):
     return "".join(TIERS[min(i, 5)] for i in indices)
 
+def expand_entry(entry):
+    '''
+    Yield the shifted variants of one template entry, from shift 0 upward until
+    a base or the template would exceed tier Y (5).
+    '''
+    # Determine base signature sorted
+    base_sorted = sorted(entry.get("BaseSignature", entry.get("BaseSignatureSorted", [])))
+    template_dev = entry["TemplateDev"]
+    recipe_indices = recipe_to_indices(entry["Recipe"])
+
+    for shift in range(0, 6):
+        # Stop if any value exceeds tier 5
+        if max(base_sorted + [template_dev]) + shift > 5:
+            break
+
+        # Shift recipe
+        shifted_recipe = indices_to_recipe([i + shift for i in recipe_indices])
+
+        # Shift bases and template
+        shifted_bases = [v + shift for v in base_sorted]
+        template_dev_absolute = template_dev + shift
+
+        # Compute relative template deviation
+        lowest_value = min(shifted_bases + [template_dev_absolute])
+        template_dev_relative = template_dev_absolute - lowest_value
+
+        # Shift bins upward
+        shifted_bins = {tier: 0.0 for tier in TIERS}
+        for i, tier in enumerate(TIERS):
+            target_index = i + shift
+            if target_index >= len(TIERS):
+                break
+            shifted_bins[TIERS[target_index]] += entry["OutputBins"][tier]
+
+        # Zero out outside min/max
+        min_val = min(shifted_bases + [template_dev_absolute])
+        max_val = max(shifted_bases + [template_dev_absolute])
+        for i, tier in enumerate(TIERS):
+            if i < min_val or i > max_val:
+                shifted_bins[tier] = 0.0
+
+        # Build expanded entry
+        yield {
+            "Recipe": shifted_recipe,
+            "BaseSignatureSorted": shifted_bases,
+            "TemplateDevAbsolute": template_dev_absolute,
+            "TemplateDevRelative": template_dev_relative,
+            "TemplatePresent": True,
+            "OutputBins": shifted_bins,
+            "IsNormalized": shift == 0,
+            "ShiftValue": shift,
+            "OriginalRecipe": entry["Recipe"]
+        }
+
 def expand_template_dataset(input_path, output_path):
     '''
     Expand a template-inclusive dataset (3-mat or 4-mat) by shifting tier values
@@ -18,97 +78,126 @@ def expand_template_dataset(input_path, output_path):
     with open(input_path) as f:
         dataset = json.load(f)
 
-    expanded_entries = []
-
-    for entry in dataset:
-        # Determine base signature sorted
-        base_sorted = sorted(entry.get("BaseSignature", entry.get("BaseSignatureSorted", [])))
-        template_dev = entry["TemplateDev"]
-
-        for shift in range(0, 6):
-            # Stop if any value exceeds tier 5
-            if max(base_sorted + [template_dev]) + shift > 5:
-                break
-
-            # Shift recipe
-            recipe_indices = recipe_to_indices(entry["Recipe"])
-            shifted_recipe = indices_to_recipe([i + shift for i in recipe_indices])
-
-            # Shift bases and template
-            shifted_bases = [v + shift for v in base_sorted]
-            template_dev_absolute = template_dev + shift
-
-            # Compute relative template deviation
-            lowest_value = min(shifted_bases + [template_dev_absolute])
-            template_dev_relative = template_dev_absolute - lowest_value
-
-            # Shift bins upward
-            shifted_bins = {tier: 0.0 for tier in TIERS}
-            for i, tier in enumerate(TIERS):
-                target_index = i + shift
-                if target_index >= len(TIERS):
-                    break
-                shifted_bins[TIERS[target_index]] += entry["OutputBins"][tier]
-
-            # Zero out outside min/max
-            min_val = min(shifted_bases + [template_dev_absolute])
-            max_val = max(shifted_bases + [template_dev_absolute])
-            for i, tier in enumerate(TIERS):
-                if i < min_val or i > max_val:
-                    shifted_bins[tier] = 0.0
-
-            # Build expanded entry
-            expanded_entry = {
-                "Recipe": shifted_recipe,
-                "BaseSignatureSorted": shifted_bases,
-                "TemplateDevAbsolute": template_dev_absolute,
-                "TemplateDevRelative": template_dev_relative,
-                "TemplatePresent": True,
-                "OutputBins": shifted_bins,
-                "IsNormalized": shift == 0,
-                "ShiftValue": shift,
-                "OriginalRecipe": entry["Recipe"]
-            }
-            expanded_entries.append(expanded_entry)
+    expanded_entries = [expanded for entry in dataset for expanded in expand_entry(entry)]
 
     with open(output_path, "w") as f:
         json.dump(expanded_entries, f, indent=2)
 
     return expanded_entries
 
+def iter_json_records(path, chunk_size=READ_CHUNK_SIZE):
+    '''
+    Yield records from a JSON Lines file or a top-level JSON array without
+    loading the whole file. Arrays are decoded one element at a time.
+    '''
+    with open(path) as f:
+        head = f.read(chunk_size)
+        stripped = head.lstrip()
+        if not stripped.startswith("["):
+            # JSON Lines: rewind and decode line by line
+            f.seek(0)
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        decoder = json.JSONDecoder()
+        buffer = stripped[1:]
+        pos = 0
+        eof = False
+        while True:
+            # Skip separators between elements
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+                # A value ending exactly at the buffer edge may continue in the next chunk
+                complete = end < len(buffer) or eof
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if complete:
+                yield record
+                pos = end
+                continue
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+def _expand_shard(shard):
+    return [json.dumps(expanded) for entry in shard for expanded in expand_entry(entry)]
+
+def _iter_shards(records, shard_size):
+    shard = []
+    for record in records:
+        shard.append(record)
+        if len(shard) >= shard_size:
+            yield shard
+            shard = []
+    if shard:
+        yield shard
+
+def stream_expand_template_dataset(input_path, output_path, workers=1, shard_size=DEFAULT_SHARD_SIZE):
+    '''
+    Streaming expand_template_dataset: reads JSON Lines or a JSON array and writes
+    expanded entries as JSON Lines, in input order. With workers > 1, shards of
+    shard_size entries are expanded in a process pool; at most 2 * workers shards
+    are in flight, so memory is bounded by shard size rather than dataset size.
+    Returns the number of expanded entries written.
+    '''
+    shards = _iter_shards(iter_json_records(input_path), shard_size)
+    written = 0
+    with open(output_path, "w") as out:
+        if workers <= 1:
+            for shard in shards:
+                lines = _expand_shard(shard)
+                out.writelines(line + "\n" for line in lines)
+                written += len(lines)
+            return written
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for shard in shards:
+                pending.append(pool.submit(_expand_shard, shard))
+                if len(pending) >= 2 * workers:
+                    lines = pending.popleft().result()
+                    out.writelines(line + "\n" for line in lines)
+                    written += len(lines)
+            while pending:
+                lines = pending.popleft().result()
+                out.writelines(line + "\n" for line in lines)
+                written += len(lines)
+    return written
+
 def validate_expanded_dataset(expanded_data):
     '''
     Validate expanded dataset for canonical compliance:
     - No tier > 5
     - Continuous bins between min and max
     - Proper fields present
+    See validator_expanded_module.validate_expanded_records.
     '''
-    invalid_tiers = []
-    bins_errors = []
-
-    for e in expanded_data:
-        # Tier limit check
-        if any(v > 5 for v in e["BaseSignatureSorted"]) or e["TemplateDevAbsolute"] > 5:
-            invalid_tiers.append(e)
-
-        # Continuity check
-        min_val = min(e["BaseSignatureSorted"] + [e["TemplateDevAbsolute"]])
-        max_val = max(e["BaseSignatureSorted"] + [e["TemplateDevAbsolute"]])
-        for idx, tier in enumerate(TIERS[min_val:max_val+1], start=min_val):
-            if e["OutputBins"][tier] == 0.0:
-                bins_errors.append({
-                    "Recipe": e["Recipe"],
-                    "ShiftValue": e["ShiftValue"],
-                    "Issue": f"Zero bin within continuous range {tier}"
-                })
-
-    return {
-        "total_entries": len(expanded_data),
-        "invalid_tiers": len(invalid_tiers),
-        "continuity_errors": len(bins_errors)
-    }
+    from validator_expanded_module import validate_expanded_records
+    return validate_expanded_records(expanded_data)
 
 # Usage Example:
 # expanded = expand_template_dataset("3mat_template_UNIFIED_SORTED.json", "3mat_template_EXPANDED.json")
 # results = validate_expanded_dataset(expanded)
 # print(results)
+#
+# Streaming (JSON Lines out, 4 worker processes):
+# python expander_module.py 3mat_template_UNIFIED_SORTED.json 3mat_template_EXPANDED.jsonl --workers 4
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Expand a template dataset into JSON Lines")
+    parser.add_argument("input", help="JSON array or JSON Lines input")
+    parser.add_argument("output", help="JSON Lines output")
+    parser.add_argument("--workers", type=int, default=1, help="process pool size (1 = in-process)")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE, help="entries per worker shard")
+    args = parser.parse_args()
+    count = stream_expand_template_dataset(args.input, args.output, args.workers, args.shard_size)
+    print(f"Wrote {count} expanded entries to {args.output}")
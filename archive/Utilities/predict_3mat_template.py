@@ -1,89 +1,97 @@
+from functools import lru_cache
 
-def predict_3mat_template(recipe):
-    qmap = {"P":0,"C":1,"F":2,"X":3,"E":4,"Y":5}
-    tiers = ["P","C","F","X","E","Y"]
-
-    # NT baseline map
-    nt_map = {
-        (0, 0, 0): [100.0, 0.0, 0.0, 0.0, 0.0, 0.0],
-        (0, 0, 1): [71.43, 28.57, 0.0, 0.0, 0.0, 0.0],
-        (0, 0, 2): [66.67, 11.11, 22.22, 0.0, 0.0, 0.0],
-        (0, 0, 3): [58.33, 16.67, 8.33, 16.67, 0.0, 0.0],
-        (0, 0, 4): [50.0, 18.75, 12.5, 6.25, 12.5, 0.0],
-        (0, 0, 5): [42.86, 19.05, 14.29, 9.52, 4.76, 9.52],
-        (0, 1, 1): [42.86, 57.14, 0.0, 0.0, 0.0, 0.0],
-        (0, 1, 2): [44.44, 33.33, 22.22, 0.0, 0.0, 0.0],
-        (0, 1, 3): [41.67, 33.33, 8.33, 16.67, 0.0, 0.0],
-        (0, 1, 4): [37.5, 31.25, 12.5, 6.25, 12.5, 0.0],
-        (0, 1, 5): [33.33, 28.57, 14.29, 9.52, 4.76, 9.52],
-        (0, 2, 2): [44.44, 11.11, 44.44, 0.0, 0.0, 0.0],
-        (0, 2, 3): [41.67, 16.67, 25.0, 16.67, 0.0, 0.0],
-        (0, 2, 4): [37.5, 18.75, 25.0, 6.25, 12.5, 0.0],
-        (0, 2, 5): [33.33, 19.05, 23.81, 9.52, 4.76, 9.52],
-        (0, 3, 3): [41.67, 16.67, 8.33, 33.33, 0.0, 0.0],
-        (0, 3, 4): [37.5, 18.75, 12.5, 18.75, 12.5, 0.0],
-        (0, 3, 5): [33.33, 19.05, 14.29, 19.05, 4.76, 9.52],
-        (0, 4, 4): [37.5, 18.75, 12.5, 6.25, 25.0, 0.0],
-        (0, 4, 5): [33.33, 19.05, 14.29, 9.52, 14.29, 9.52],
-        (0, 5, 5): [33.33, 19.05, 14.29, 9.52, 4.76, 19.05]
-    }
-
-    # Delta parametric map
-    delta_map = {
-        (0, 0, 0): {'Delta_P': 0.0, 'Delta_C': 0.0, 'Delta_F': 0.0, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (0, 0, 1): {'Delta_P': -15.87, 'Delta_C': 15.87, 'Delta_F': 0.0, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (0, 0, 2): {'Delta_P': -12.12, 'Delta_C': -2.02, 'Delta_F': 14.14, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (0, 0, 3): {'Delta_P': -8.33, 'Delta_C': -2.38, 'Delta_F': -1.19, 'Delta_X': 11.9, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (0, 0, 4): {'Delta_P': -5.56, 'Delta_C': -2.08, 'Delta_F': -1.39, 'Delta_X': -0.69, 'Delta_E': 9.72, 'Delta_Y': 0.0},
-        (0, 0, 5): {'Delta_P': -3.73, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': 7.87},
-        (0, 1, 0): {'Delta_P': 6.35, 'Delta_C': -6.35, 'Delta_F': 0.0, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (0, 1, 1): {'Delta_P': -9.53, 'Delta_C': 9.53, 'Delta_F': 0.0, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (0, 1, 2): {'Delta_P': -8.08, 'Delta_C': -6.06, 'Delta_F': 14.14, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (0, 1, 3): {'Delta_P': -5.96, 'Delta_C': -4.76, 'Delta_F': -1.19, 'Delta_X': 11.9, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (0, 1, 4): {'Delta_P': -4.17, 'Delta_C': -3.47, 'Delta_F': -1.39, 'Delta_X': -0.69, 'Delta_E': 9.72, 'Delta_Y': 0.0},
-        (0, 1, 5): {'Delta_P': -2.9, 'Delta_C': -2.48, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': 7.87},
-        (0, 2, 0): {'Delta_P': 6.06, 'Delta_C': -2.02, 'Delta_F': -4.04, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (0, 2, 1): {'Delta_P': -8.08, 'Delta_C': 12.12, 'Delta_F': -4.04, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (0, 2, 2): {'Delta_P': -8.08, 'Delta_C': -2.02, 'Delta_F': 10.11, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (0, 2, 3): {'Delta_P': -5.96, 'Delta_C': -2.38, 'Delta_F': -3.57, 'Delta_X': 11.9, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (0, 2, 4): {'Delta_P': -4.17, 'Delta_C': -2.08, 'Delta_F': -2.78, 'Delta_X': -0.69, 'Delta_E': 9.72, 'Delta_Y': 0.0},
-        (0, 2, 5): {'Delta_P': -2.9, 'Delta_C': -1.66, 'Delta_F': -2.07, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': 7.87},
-        (0, 3, 0): {'Delta_P': 5.96, 'Delta_C': -2.38, 'Delta_F': -1.19, 'Delta_X': -2.38, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (0, 3, 1): {'Delta_P': -5.96, 'Delta_C': 9.53, 'Delta_F': -1.19, 'Delta_X': -2.38, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (0, 3, 2): {'Delta_P': -5.96, 'Delta_C': -2.38, 'Delta_F': 10.71, 'Delta_X': -2.38, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (0, 3, 3): {'Delta_P': -5.96, 'Delta_C': -2.38, 'Delta_F': -1.19, 'Delta_X': 9.53, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (0, 3, 4): {'Delta_P': -4.17, 'Delta_C': -2.08, 'Delta_F': -1.39, 'Delta_X': -2.08, 'Delta_E': 9.72, 'Delta_Y': 0.0},
-        (0, 3, 5): {'Delta_P': -2.9, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': -1.66, 'Delta_E': -0.41, 'Delta_Y': 7.87},
-        (0, 4, 0): {'Delta_P': 5.56, 'Delta_C': -2.08, 'Delta_F': -1.39, 'Delta_X': -0.69, 'Delta_E': -1.39, 'Delta_Y': 0.0},
-        (0, 4, 1): {'Delta_P': -4.17, 'Delta_C': 7.64, 'Delta_F': -1.39, 'Delta_X': -0.69, 'Delta_E': -1.39, 'Delta_Y': 0.0},
-        (0, 4, 2): {'Delta_P': -4.17, 'Delta_C': -2.08, 'Delta_F': 8.33, 'Delta_X': -0.69, 'Delta_E': -1.39, 'Delta_Y': 0.0},
-        (0, 4, 3): {'Delta_P': -4.17, 'Delta_C': -2.08, 'Delta_F': -1.39, 'Delta_X': 9.03, 'Delta_E': -1.39, 'Delta_Y': 0.0},
-        (0, 4, 4): {'Delta_P': -4.17, 'Delta_C': -2.08, 'Delta_F': -1.39, 'Delta_X': -0.69, 'Delta_E': 8.33, 'Delta_Y': 0.0},
-        (0, 4, 5): {'Delta_P': -2.9, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': -1.25, 'Delta_Y': 7.87},
-        (0, 5, 0): {'Delta_P': 4.97, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': -0.82},
-        (0, 5, 1): {'Delta_P': -2.9, 'Delta_C': 6.21, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': -0.82},
-        (0, 5, 2): {'Delta_P': -2.9, 'Delta_C': -1.66, 'Delta_F': 6.62, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': -0.82},
-        (0, 5, 3): {'Delta_P': -2.9, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': 7.04, 'Delta_E': -0.41, 'Delta_Y': -0.82},
-        (0, 5, 4): {'Delta_P': -2.9, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': 7.45, 'Delta_Y': -0.82},
-        (0, 5, 5): {'Delta_P': -2.9, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': 7.04},
-        (1, 1, 0): {'Delta_P': 12.7, 'Delta_C': -12.7, 'Delta_F': 0.0, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (1, 2, 0): {'Delta_P': 10.11, 'Delta_C': -6.06, 'Delta_F': -4.04, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (1, 3, 0): {'Delta_P': 8.33, 'Delta_C': -4.76, 'Delta_F': -1.19, 'Delta_X': -2.38, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (1, 4, 0): {'Delta_P': 6.94, 'Delta_C': -3.47, 'Delta_F': -1.39, 'Delta_X': -0.69, 'Delta_E': -1.39, 'Delta_Y': 0.0},
-        (1, 5, 0): {'Delta_P': 5.8, 'Delta_C': -2.48, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': -0.82},
-        (2, 2, 0): {'Delta_P': 10.11, 'Delta_C': -2.02, 'Delta_F': -8.08, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (2, 3, 0): {'Delta_P': 8.33, 'Delta_C': -2.38, 'Delta_F': -3.57, 'Delta_X': -2.38, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (2, 4, 0): {'Delta_P': 6.94, 'Delta_C': -2.08, 'Delta_F': -2.78, 'Delta_X': -0.69, 'Delta_E': -1.39, 'Delta_Y': 0.0},
-        (2, 5, 0): {'Delta_P': 5.8, 'Delta_C': -1.66, 'Delta_F': -2.07, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': -0.82},
-        (3, 3, 0): {'Delta_P': 8.33, 'Delta_C': -2.38, 'Delta_F': -1.19, 'Delta_X': -4.76, 'Delta_E': 0.0, 'Delta_Y': 0.0},
-        (3, 5, 0): {'Delta_P': 5.8, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': -1.66, 'Delta_E': -0.41, 'Delta_Y': -0.82},
-        (3, 4, 0): {'Delta_P': 6.94, 'Delta_C': -2.08, 'Delta_F': -1.39, 'Delta_X': -2.08, 'Delta_E': -1.39, 'Delta_Y': 0.0},
-        (4, 4, 0): {'Delta_P': 6.94, 'Delta_C': -2.08, 'Delta_F': -1.39, 'Delta_X': -0.69, 'Delta_E': -2.78, 'Delta_Y': 0.0},
-        (4, 5, 0): {'Delta_P': 5.8, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': -1.25, 'Delta_Y': -0.82},
-        (5, 5, 0): {'Delta_P': 5.8, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': -1.66}
-    }
-
-    devs = [qmap[ch] for ch in recipe]
+import numpy as np
+
+QMAP = {"P":0,"C":1,"F":2,"X":3,"E":4,"Y":5}
+TIERS = ["P","C","F","X","E","Y"]
+DELTA_FIELDS = ["Delta_P", "Delta_C", "Delta_F", "Delta_X", "Delta_E", "Delta_Y"]
+
+# NT baseline map
+NT_MAP = {
+    (0, 0, 0): [100.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+    (0, 0, 1): [71.43, 28.57, 0.0, 0.0, 0.0, 0.0],
+    (0, 0, 2): [66.67, 11.11, 22.22, 0.0, 0.0, 0.0],
+    (0, 0, 3): [58.33, 16.67, 8.33, 16.67, 0.0, 0.0],
+    (0, 0, 4): [50.0, 18.75, 12.5, 6.25, 12.5, 0.0],
+    (0, 0, 5): [42.86, 19.05, 14.29, 9.52, 4.76, 9.52],
+    (0, 1, 1): [42.86, 57.14, 0.0, 0.0, 0.0, 0.0],
+    (0, 1, 2): [44.44, 33.33, 22.22, 0.0, 0.0, 0.0],
+    (0, 1, 3): [41.67, 33.33, 8.33, 16.67, 0.0, 0.0],
+    (0, 1, 4): [37.5, 31.25, 12.5, 6.25, 12.5, 0.0],
+    (0, 1, 5): [33.33, 28.57, 14.29, 9.52, 4.76, 9.52],
+    (0, 2, 2): [44.44, 11.11, 44.44, 0.0, 0.0, 0.0],
+    (0, 2, 3): [41.67, 16.67, 25.0, 16.67, 0.0, 0.0],
+    (0, 2, 4): [37.5, 18.75, 25.0, 6.25, 12.5, 0.0],
+    (0, 2, 5): [33.33, 19.05, 23.81, 9.52, 4.76, 9.52],
+    (0, 3, 3): [41.67, 16.67, 8.33, 33.33, 0.0, 0.0],
+    (0, 3, 4): [37.5, 18.75, 12.5, 18.75, 12.5, 0.0],
+    (0, 3, 5): [33.33, 19.05, 14.29, 19.05, 4.76, 9.52],
+    (0, 4, 4): [37.5, 18.75, 12.5, 6.25, 25.0, 0.0],
+    (0, 4, 5): [33.33, 19.05, 14.29, 9.52, 14.29, 9.52],
+    (0, 5, 5): [33.33, 19.05, 14.29, 9.52, 4.76, 19.05]
+}
+
+# Delta parametric map
+DELTA_MAP = {
+    (0, 0, 0): {'Delta_P': 0.0, 'Delta_C': 0.0, 'Delta_F': 0.0, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (0, 0, 1): {'Delta_P': -15.87, 'Delta_C': 15.87, 'Delta_F': 0.0, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (0, 0, 2): {'Delta_P': -12.12, 'Delta_C': -2.02, 'Delta_F': 14.14, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (0, 0, 3): {'Delta_P': -8.33, 'Delta_C': -2.38, 'Delta_F': -1.19, 'Delta_X': 11.9, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (0, 0, 4): {'Delta_P': -5.56, 'Delta_C': -2.08, 'Delta_F': -1.39, 'Delta_X': -0.69, 'Delta_E': 9.72, 'Delta_Y': 0.0},
+    (0, 0, 5): {'Delta_P': -3.73, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': 7.87},
+    (0, 1, 0): {'Delta_P': 6.35, 'Delta_C': -6.35, 'Delta_F': 0.0, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (0, 1, 1): {'Delta_P': -9.53, 'Delta_C': 9.53, 'Delta_F': 0.0, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (0, 1, 2): {'Delta_P': -8.08, 'Delta_C': -6.06, 'Delta_F': 14.14, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (0, 1, 3): {'Delta_P': -5.96, 'Delta_C': -4.76, 'Delta_F': -1.19, 'Delta_X': 11.9, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (0, 1, 4): {'Delta_P': -4.17, 'Delta_C': -3.47, 'Delta_F': -1.39, 'Delta_X': -0.69, 'Delta_E': 9.72, 'Delta_Y': 0.0},
+    (0, 1, 5): {'Delta_P': -2.9, 'Delta_C': -2.48, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': 7.87},
+    (0, 2, 0): {'Delta_P': 6.06, 'Delta_C': -2.02, 'Delta_F': -4.04, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (0, 2, 1): {'Delta_P': -8.08, 'Delta_C': 12.12, 'Delta_F': -4.04, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (0, 2, 2): {'Delta_P': -8.08, 'Delta_C': -2.02, 'Delta_F': 10.11, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (0, 2, 3): {'Delta_P': -5.96, 'Delta_C': -2.38, 'Delta_F': -3.57, 'Delta_X': 11.9, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (0, 2, 4): {'Delta_P': -4.17, 'Delta_C': -2.08, 'Delta_F': -2.78, 'Delta_X': -0.69, 'Delta_E': 9.72, 'Delta_Y': 0.0},
+    (0, 2, 5): {'Delta_P': -2.9, 'Delta_C': -1.66, 'Delta_F': -2.07, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': 7.87},
+    (0, 3, 0): {'Delta_P': 5.96, 'Delta_C': -2.38, 'Delta_F': -1.19, 'Delta_X': -2.38, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (0, 3, 1): {'Delta_P': -5.96, 'Delta_C': 9.53, 'Delta_F': -1.19, 'Delta_X': -2.38, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (0, 3, 2): {'Delta_P': -5.96, 'Delta_C': -2.38, 'Delta_F': 10.71, 'Delta_X': -2.38, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (0, 3, 3): {'Delta_P': -5.96, 'Delta_C': -2.38, 'Delta_F': -1.19, 'Delta_X': 9.53, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (0, 3, 4): {'Delta_P': -4.17, 'Delta_C': -2.08, 'Delta_F': -1.39, 'Delta_X': -2.08, 'Delta_E': 9.72, 'Delta_Y': 0.0},
+    (0, 3, 5): {'Delta_P': -2.9, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': -1.66, 'Delta_E': -0.41, 'Delta_Y': 7.87},
+    (0, 4, 0): {'Delta_P': 5.56, 'Delta_C': -2.08, 'Delta_F': -1.39, 'Delta_X': -0.69, 'Delta_E': -1.39, 'Delta_Y': 0.0},
+    (0, 4, 1): {'Delta_P': -4.17, 'Delta_C': 7.64, 'Delta_F': -1.39, 'Delta_X': -0.69, 'Delta_E': -1.39, 'Delta_Y': 0.0},
+    (0, 4, 2): {'Delta_P': -4.17, 'Delta_C': -2.08, 'Delta_F': 8.33, 'Delta_X': -0.69, 'Delta_E': -1.39, 'Delta_Y': 0.0},
+    (0, 4, 3): {'Delta_P': -4.17, 'Delta_C': -2.08, 'Delta_F': -1.39, 'Delta_X': 9.03, 'Delta_E': -1.39, 'Delta_Y': 0.0},
+    (0, 4, 4): {'Delta_P': -4.17, 'Delta_C': -2.08, 'Delta_F': -1.39, 'Delta_X': -0.69, 'Delta_E': 8.33, 'Delta_Y': 0.0},
+    (0, 4, 5): {'Delta_P': -2.9, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': -1.25, 'Delta_Y': 7.87},
+    (0, 5, 0): {'Delta_P': 4.97, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': -0.82},
+    (0, 5, 1): {'Delta_P': -2.9, 'Delta_C': 6.21, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': -0.82},
+    (0, 5, 2): {'Delta_P': -2.9, 'Delta_C': -1.66, 'Delta_F': 6.62, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': -0.82},
+    (0, 5, 3): {'Delta_P': -2.9, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': 7.04, 'Delta_E': -0.41, 'Delta_Y': -0.82},
+    (0, 5, 4): {'Delta_P': -2.9, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': 7.45, 'Delta_Y': -0.82},
+    (0, 5, 5): {'Delta_P': -2.9, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': 7.04},
+    (1, 1, 0): {'Delta_P': 12.7, 'Delta_C': -12.7, 'Delta_F': 0.0, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (1, 2, 0): {'Delta_P': 10.11, 'Delta_C': -6.06, 'Delta_F': -4.04, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (1, 3, 0): {'Delta_P': 8.33, 'Delta_C': -4.76, 'Delta_F': -1.19, 'Delta_X': -2.38, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (1, 4, 0): {'Delta_P': 6.94, 'Delta_C': -3.47, 'Delta_F': -1.39, 'Delta_X': -0.69, 'Delta_E': -1.39, 'Delta_Y': 0.0},
+    (1, 5, 0): {'Delta_P': 5.8, 'Delta_C': -2.48, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': -0.82},
+    (2, 2, 0): {'Delta_P': 10.11, 'Delta_C': -2.02, 'Delta_F': -8.08, 'Delta_X': 0.0, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (2, 3, 0): {'Delta_P': 8.33, 'Delta_C': -2.38, 'Delta_F': -3.57, 'Delta_X': -2.38, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (2, 4, 0): {'Delta_P': 6.94, 'Delta_C': -2.08, 'Delta_F': -2.78, 'Delta_X': -0.69, 'Delta_E': -1.39, 'Delta_Y': 0.0},
+    (2, 5, 0): {'Delta_P': 5.8, 'Delta_C': -1.66, 'Delta_F': -2.07, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': -0.82},
+    (3, 3, 0): {'Delta_P': 8.33, 'Delta_C': -2.38, 'Delta_F': -1.19, 'Delta_X': -4.76, 'Delta_E': 0.0, 'Delta_Y': 0.0},
+    (3, 5, 0): {'Delta_P': 5.8, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': -1.66, 'Delta_E': -0.41, 'Delta_Y': -0.82},
+    (3, 4, 0): {'Delta_P': 6.94, 'Delta_C': -2.08, 'Delta_F': -1.39, 'Delta_X': -2.08, 'Delta_E': -1.39, 'Delta_Y': 0.0},
+    (4, 4, 0): {'Delta_P': 6.94, 'Delta_C': -2.08, 'Delta_F': -1.39, 'Delta_X': -0.69, 'Delta_E': -2.78, 'Delta_Y': 0.0},
+    (4, 5, 0): {'Delta_P': 5.8, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': -1.25, 'Delta_Y': -0.82},
+    (5, 5, 0): {'Delta_P': 5.8, 'Delta_C': -1.66, 'Delta_F': -1.25, 'Delta_X': -0.82, 'Delta_E': -0.41, 'Delta_Y': -1.66}
+}
+
+def _code3(a, b, c):
+    return (a * 6 + b) * 6 + c
+
+
+def _predict_uncached(recipe):
+    devs = [QMAP[ch] for ch in recipe]
     min_dev = min(devs)
     max_dev = max(devs)
 
@@ -92,25 +100,18 @@ def predict_3mat_template(recipe):
 
     # Get NT baseline
     nt_key = tuple(sorted(norm))
-    if nt_key not in nt_map:
+    if nt_key not in NT_MAP:
         return None
-    nt_bins = nt_map[nt_key]
+    nt_bins = NT_MAP[nt_key]
 
     # Get delta
     min_b, max_b = sorted(norm[:2])
     t_dev = norm[2]
-    delta = delta_map.get((min_b, max_b, t_dev))
+    delta = DELTA_MAP.get((min_b, max_b, t_dev))
     if delta is None:
         return None
 
-    predicted = [
-        round(nt_bins[0] + delta['Delta_P'], 2),
-        round(nt_bins[1] + delta['Delta_C'], 2),
-        round(nt_bins[2] + delta['Delta_F'], 2),
-        round(nt_bins[3] + delta['Delta_X'], 2),
-        round(nt_bins[4] + delta['Delta_E'], 2),
-        round(nt_bins[5] + delta['Delta_Y'], 2)
-    ]
+    predicted = [round(nt_bins[i] + delta[field], 2) for i, field in enumerate(DELTA_FIELDS)]
 
     # Map normalized bins to actual min..max tiers
     spread = max_dev - min_dev
@@ -119,6 +120,47 @@ def predict_3mat_template(recipe):
         tier_index = min_dev + i
         if tier_index > max_dev:
             break
-        mapped_bins[tiers[tier_index]] = prob
+        mapped_bins[TIERS[tier_index]] = prob
 
     return mapped_bins
+
+
+@lru_cache(maxsize=512)
+def _predict_cached(recipe):
+    mapped_bins = _predict_uncached(recipe)
+    return None if mapped_bins is None else tuple(mapped_bins.items())
+
+
+def predict_3mat_template(recipe):
+    # Recipes may be strings or sequences of tier letters; cache on the string
+    cached = _predict_cached("".join(recipe))
+    return None if cached is None else dict(cached)
+
+
+# Every 3-mat recipe precomputed: row _code3(q0, q1, q2) holds the mapped bins at
+# their absolute tiers (0.0 outside min..max), or NaN if there is no prediction.
+RECIPE_INDEX = {}
+RECIPE_TABLE = np.full((216, 6), np.nan)
+for _q in np.ndindex(6, 6, 6):
+    _recipe = "".join(TIERS[i] for i in _q)
+    RECIPE_INDEX[_recipe] = _code3(*_q)
+    _bins = predict_3mat_template(_recipe)
+    if _bins is not None:
+        RECIPE_TABLE[_code3(*_q)] = [_bins.get(tier, 0.0) for tier in TIERS]
+
+
+def predict_3mat_template_many(recipes):
+    """
+    Vectorized predict_3mat_template.
+
+    recipes: sequence of 3-char recipes (strings or letter sequences), or an int array [N, 3] of tier indices.
+    Returns an [N, 6] array in tier order P..Y; rows without a prediction are NaN.
+    """
+    if isinstance(recipes, np.ndarray) and recipes.dtype.kind in "iu":
+        valid = ((recipes >= 0) & (recipes < 6)).all(axis=1)
+        codes = np.where(valid, _code3(recipes[:, 0], recipes[:, 1], recipes[:, 2]), -1)
+    else:
+        codes = np.fromiter((RECIPE_INDEX.get("".join(r), -1) for r in recipes), dtype=np.int64)
+    result = RECIPE_TABLE[np.maximum(codes, 0)]
+    result[codes < 0] = np.nan
+    return result
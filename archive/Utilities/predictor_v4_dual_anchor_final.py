@@ -14,6 +14,19 @@ from rules_contract_v3 import (
     get_canonical_tier_order,
     validate_min_max_continuous_bins
 )
+import os
+import tempfile
+
+import numpy as np
+from signature_table import (
+    build_signature_table,
+    check_signature_parity,
+    encode_signature,
+    encode_signatures,
+    iter_signature_groups,
+    load_signature_table as read_signature_table,
+    save_signature_table
+)
 
 TEMPLATE_DELTAS = {
     ((0, 0), 0): {'Delta_P': -60.87, 'Delta_C': 17.39, 'Delta_F': 13.04, 'Delta_X': 8.7, 'Delta_E': 4.35, 'Delta_Y': 17.39},
@@ -118,13 +131,76 @@ TEMPLATE_DELTAS = {
 
 TEMPLATE_P_CANONICAL = {((0, 0, 0), 0): {'P': 53.33, 'C': 6.67, 'F': 40.0, 'X': 0.0, 'E': 0.0, 'Y': 0.0}, ((0, 4, 4), 0): {'P': 40.74, 'C': 22.22, 'F': 11.11, 'X': 7.41, 'E': 3.7, 'Y': 14.81}, ((0, 1, 4), 0): {'P': 54.55, 'C': 22.73, 'F': 9.09, 'X': 4.55, 'E': 9.09, 'Y': 0.0}, ((0, 1, 2), 0): {'P': 66.67, 'C': 20.0, 'F': 13.33, 'X': 0.0, 'E': 0.0, 'Y': 0.0}, ((0, 0, 2), 0): {'P': 80.0, 'C': 6.67, 'F': 13.33, 'X': 0.0, 'E': 0.0, 'Y': 0.0}, ((0, 1, 1), 0): {'P': 69.23, 'C': 30.77, 'F': 0.0, 'X': 0.0, 'E': 0.0, 'Y': 0.0}, ((0, 5, 5), 0): {'P': 48.15, 'C': 14.81, 'F': 11.11, 'X': 7.41, 'E': 3.7, 'Y': 14.81}, ((0, 4, 5), 0): {'P': 48.15, 'C': 14.81, 'F': 11.11, 'X': 7.41, 'E': 11.11, 'Y': 7.41}, ((0, 3, 5), 0): {'P': 48.15, 'C': 14.81, 'F': 11.11, 'X': 14.81, 'E': 3.7, 'Y': 7.41}, ((0, 2, 5), 0): {'P': 48.15, 'C': 14.81, 'F': 18.52, 'X': 7.41, 'E': 3.7, 'Y': 7.41}, ((0, 3, 4), 0): {'P': 40.74, 'C': 22.22, 'F': 11.11, 'X': 7.41, 'E': 11.11, 'Y': 7.41}, ((0, 1, 5), 0): {'P': 48.15, 'C': 22.22, 'F': 11.11, 'X': 7.41, 'E': 3.7, 'Y': 7.41}, ((0, 2, 4), 0): {'P': 48.15, 'C': 14.81, 'F': 11.11, 'X': 14.81, 'E': 3.7, 'Y': 7.41}, ((0, 3, 3), 0): {'P': 40.74, 'C': 14.81, 'F': 18.52, 'X': 7.41, 'E': 3.7, 'Y': 14.81}, ((0, 0, 1), 0): {'P': 84.62, 'C': 15.38, 'F': 0.0, 'X': 0.0, 'E': 0.0, 'Y': 0.0}, ((0, 0, 3), 0): {'P': 72.22, 'C': 11.11, 'F': 5.56, 'X': 11.11, 'E': 0.0, 'Y': 0.0}, ((0, 0, 4), 0): {'P': 63.64, 'C': 13.64, 'F': 9.09, 'X': 4.55, 'E': 9.09, 'Y': 0.0}, ((0, 0, 5), 0): {'P': 55.56, 'C': 14.81, 'F': 11.11, 'X': 7.41, 'E': 3.7, 'Y': 7.41}}
 
+# Curves recorded from the original predict for every signature (see __main__)
+BASELINE_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "predictor_v4_dual_anchor_final_baseline.npy")
+
 class PredictorV4:
-    def __init__(self, nt_data=None, template_data=None):
+    def __init__(self, nt_data=None, template_data=None, signature_table_path=None):
         self.nt_data = nt_data or {}
         self.template_data = template_data or {}
         self.tier_order = get_canonical_tier_order()
+        self.signature_table = None  # Dense curves per encoded signature, see compile_signature_table
+        if signature_table_path is not None:
+            self.load_signature_table(signature_table_path)
+
+    def compile_signature_table(self, path=None):
+        """
+        Evaluate the predictor once for every valid signature (see signature_table)
+        so predict and predict_many become array lookups. Optionally saves the
+        table to path as .npy.
+        """
+        self.signature_table = build_signature_table(self._predict_fresh, self.tier_order)
+        if path is not None:
+            save_signature_table(path, self.signature_table)
+        return self.signature_table
+
+    def load_signature_table(self, path):
+        """
+        Use a table saved by compile_signature_table(path). The table must have
+        been compiled from the same nt_data and template_data.
+        """
+        self.signature_table = read_signature_table(path)
+        return self.signature_table
 
     def predict(self, base_signature_sorted, template_dev=None):
+        if self.signature_table is not None:
+            row = encode_signature(base_signature_sorted, template_dev)
+            if row >= 0:
+                return dict(zip(self.tier_order, self.signature_table[row].tolist()))
+        return self._predict_uncompiled(base_signature_sorted, template_dev)
+
+    def predict_many(self, bases, template_devs=None):
+        """
+        Predict N signatures at once.
+
+        bases: ndarray[N, k] of base tiers; template_devs: ndarray[N], -1 for no template.
+        Returns ndarray[N, 6] of curves in canonical tier order.
+        """
+        if self.signature_table is None:
+            self.compile_signature_table()
+        bases = np.asarray(bases)
+        rows = encode_signatures(bases, template_devs)
+        curves = self.signature_table[np.maximum(rows, 0)]
+        for i in np.flatnonzero(rows < 0):
+            # Outside the table: evaluate directly
+            dev = None if template_devs is None or template_devs[i] < 0 else int(template_devs[i])
+            curve = self._predict_uncompiled([int(b) for b in bases[i]], dev)
+            curves[i] = [curve[tier] for tier in self.tier_order]
+        return curves
+
+    def _predict_fresh(self, base_signature_sorted, template_dev=None):
+        # _enforce_continuous_bins fills gaps in shared TEMPLATE_P_CANONICAL entries
+        # in place, so later predictions depend on call order. The compiled table
+        # holds each signature's prediction from the unmodified canonical map.
+        snapshot = {key: dict(curve) for key, curve in TEMPLATE_P_CANONICAL.items()}
+        try:
+            return self._predict_uncompiled(base_signature_sorted, template_dev)
+        finally:
+            for key, curve in snapshot.items():
+                TEMPLATE_P_CANONICAL[key].clear()
+                TEMPLATE_P_CANONICAL[key].update(curve)
+
+    def _predict_uncompiled(self, base_signature_sorted, template_dev=None):
         # Step 1: Normalize bases for NT lookup
         norm_bases, base_offset = self._normalize_bases(base_signature_sorted)
         nt_curve = self._lookup_nt_curve(norm_bases)
@@ -257,3 +333,18 @@ if __name__ == "__main__":
     predictor = PredictorV4()
     result = predictor.predict([1,5,5], template_dev=0)
     print(result)
+
+    # Parity check: compiled predictions vs curves recorded from the original
+    # implementation (one fresh predictor state per signature)
+    baseline = read_signature_table(BASELINE_TABLE_PATH)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "signatures.npy")
+        PredictorV4().compile_signature_table(path)
+        predictor = PredictorV4(signature_table_path=path)
+    mismatches = check_signature_parity(baseline, predictor.predict, predictor.tier_order)
+    print(f"Signature table mismatches vs baseline: {len(mismatches)}")
+    many_mismatches = sum(
+        int((~np.all(predictor.predict_many(bases, devs) == baseline[rows], axis=1)).sum())
+        for rows, bases, devs in iter_signature_groups()
+    )
+    print(f"predict_many mismatches vs baseline: {many_mismatches}")
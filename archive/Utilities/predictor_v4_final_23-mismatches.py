@@ -2,14 +2,171 @@ adjustment_layer = {((0, 0, 4), 3): {'P': -5.950145268242089, 'C': 6.08132569910
 
 
 from rules_contract_v3 import get_canonical_tier_order, validate_min_max_continuous_bins
+import os
+import tempfile
+
+import numpy as np
+from signature_table import (
+    build_signature_table,
+    check_signature_parity,
+    encode_signature,
+    encode_signatures,
+    iter_signature_groups,
+    load_signature_table as read_signature_table,
+    save_signature_table
+)
+
+# Polynomial template bias per tier over features [d, s, d^2, d*s, s^2]
+TEMPLATE_BIAS_COEFFS = {'P': {'coef': [0.9857804543376465, 16.215169900933873, -0.434803432635146, 0.2515160864154762, -1.934475954514867], 'intercept': -43.65919500029081}, 'C': {'coef': [-36.59778833217798, -8.662165431963516, 4.794018376628289, 0.346310586617832, 1.2614632431136423], 'intercept': 65.76575893004919}, 'F': {'coef': [11.513743105906238, -10.812735828987195, -2.0607654250193193, 0.3587906760159951, 1.1842838043543824], 'intercept': 4.913411601860346}, 'X': {'coef': [20.692933641504275, -0.3602510327928754, -3.086230761379506, -0.6246098636948041, 0.16607469195316116], 'intercept': -17.660534487305497}, 'E': {'coef': [21.577718131516793, 4.507777846241174, -2.9690842100965558, -0.6108382386180624, -0.5191191885886383], 'intercept': -27.098918172607824}, 'Y': {'coef': [-18.171691336199714, -0.8847902017467351, 3.7564594874239052, 0.2787919234897869, -0.15860250328547243], 'intercept': 17.74029543992617}}
+
+TIER_COUNT = 6
+
+# adjustment_layer as a dense array indexed by radix(normalized bases) * 6 + template_dev
+ADJUSTMENT_BASES = 3
+ADJUSTMENT_ARRAY = np.zeros((TIER_COUNT ** ADJUSTMENT_BASES * TIER_COUNT, TIER_COUNT), dtype=np.float64)
+ADJUSTMENT_PRESENT = np.zeros(len(ADJUSTMENT_ARRAY), dtype=bool)
+for (_norm_bases, _dev), _deltas in adjustment_layer.items():
+    _row = ((_norm_bases[0] * TIER_COUNT + _norm_bases[1]) * TIER_COUNT + _norm_bases[2]) * TIER_COUNT + _dev
+    ADJUSTMENT_ARRAY[_row] = [_deltas[tier] for tier in get_canonical_tier_order()]
+    ADJUSTMENT_PRESENT[_row] = True
+
+# Curves recorded from the original predict for every signature (see __main__)
+BASELINE_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "predictor_v4_final_23-mismatches_baseline.npy")
 
 class PredictorV4:
-    def __init__(self, nt_data=None, template_data=None):
+    def __init__(self, nt_data=None, template_data=None, signature_table_path=None):
         self.nt_data = nt_data or {}
         self.template_data = template_data or {}
         self.tier_order = get_canonical_tier_order()
+        self.signature_table = None  # Dense curves per encoded signature, see compile_signature_table
+        if signature_table_path is not None:
+            self.load_signature_table(signature_table_path)
+        self._nt_curve_arrays = {}  # Bases count -> dense NT curves for predict_batch
+
+    def compile_signature_table(self, path=None):
+        """
+        Evaluate the predictor once for every valid signature (see signature_table)
+        so predict and predict_many become array lookups. Optionally saves the
+        table to path as .npy.
+        """
+        self.signature_table = build_signature_table(self._predict_uncompiled, self.tier_order)
+        if path is not None:
+            save_signature_table(path, self.signature_table)
+        return self.signature_table
+
+    def load_signature_table(self, path):
+        """
+        Use a table saved by compile_signature_table(path). The table must have
+        been compiled from the same nt_data and template_data.
+        """
+        self.signature_table = read_signature_table(path)
+        return self.signature_table
 
     def predict(self, base_signature_sorted, template_dev=None):
+        if self.signature_table is not None:
+            row = encode_signature(base_signature_sorted, template_dev)
+            if row >= 0:
+                return dict(zip(self.tier_order, self.signature_table[row].tolist()))
+        return self._predict_uncompiled(base_signature_sorted, template_dev)
+
+    def predict_many(self, bases, template_devs=None):
+        """
+        Predict N signatures at once.
+
+        bases: ndarray[N, k] of base tiers; template_devs: ndarray[N], -1 for no template.
+        Returns ndarray[N, 6] of curves in canonical tier order.
+        """
+        if self.signature_table is None:
+            self.compile_signature_table()
+        bases = np.asarray(bases)
+        rows = encode_signatures(bases, template_devs)
+        curves = self.signature_table[np.maximum(rows, 0)]
+        for i in np.flatnonzero(rows < 0):
+            # Outside the table: evaluate directly
+            dev = None if template_devs is None or template_devs[i] < 0 else int(template_devs[i])
+            curve = self._predict_uncompiled([int(b) for b in bases[i]], dev)
+            curves[i] = [curve[tier] for tier in self.tier_order]
+        return curves
+
+    def predict_batch(self, bases, template_devs=None):
+        """
+        Run the shift, bias, continuity and normalization steps on N signatures at once.
+
+        bases: ndarray[N, k] of base tiers; template_devs: ndarray[N], -1 for no template.
+        Returns ndarray[N, 6] of curves in canonical tier order, matching predict row by row.
+        """
+        bases = np.sort(np.asarray(bases, dtype=np.int64), axis=1)
+        n, k = bases.shape
+        if template_devs is None:
+            template_devs = np.full(n, -1, dtype=np.int64)
+        template_devs = np.asarray(template_devs, dtype=np.int64)
+
+        base_offset = bases[:, 0]
+        norm_codes = (bases - base_offset[:, None]) @ (TIER_COUNT ** np.arange(k - 1, -1, -1))
+        nt_curves = self._nt_curve_array(k)[norm_codes]
+        curves = self._shift_curves(nt_curves, base_offset)
+
+        has_template = template_devs >= 0
+        if has_template.any():
+            spread = bases[:, -1] - base_offset
+            biased = self._apply_template_bias_batch(curves, spread, template_devs, norm_codes, k)
+            curves = np.where(has_template[:, None], biased, curves)
+
+        low = np.where(has_template, np.minimum(base_offset, template_devs), base_offset)
+        high = np.where(has_template, np.maximum(bases[:, -1], template_devs), bases[:, -1])
+        return self._enforce_continuous_bins_batch(curves, low, high)
+
+    def _nt_curve_array(self, k):
+        """Dense [6^k, 6] array of NT curves indexed by the radix code of normalized bases."""
+        cache = self._nt_curve_arrays
+        if k not in cache:
+            table = np.zeros((TIER_COUNT ** k, TIER_COUNT), dtype=np.float64)
+            for norm_bases, curve in self.nt_data.get(k, {}).items():
+                code = 0
+                for b in norm_bases:
+                    code = code * TIER_COUNT + b
+                table[code] = [curve[tier] for tier in self.tier_order]
+            cache[k] = table
+        return cache[k]
+
+    def _shift_curves(self, curves, offsets):
+        source = np.arange(TIER_COUNT)[None, :] - offsets[:, None]
+        in_range = source >= 0
+        values = np.take_along_axis(curves, np.where(in_range, source, 0), axis=1)
+        return np.where(in_range & (values > 0), values, 0.0)
+
+    def _apply_template_bias_batch(self, curves, spread, template_devs, norm_codes, k):
+        d = template_devs.astype(np.float64)
+        s = spread.astype(np.float64)
+        features = [d, s, d**2, d*s, s**2]
+        adjusted = np.empty_like(curves)
+        for i, tier in enumerate(self.tier_order):
+            # Accumulate in the same order as the scalar path for identical rounding
+            delta = 0.0
+            for ci, fi in zip(TEMPLATE_BIAS_COEFFS[tier]['coef'], features):
+                delta = delta + ci * fi
+            adjusted[:, i] = curves[:, i] + (delta + TEMPLATE_BIAS_COEFFS[tier]['intercept'])
+
+        if k == ADJUSTMENT_BASES:
+            rows = norm_codes * TIER_COUNT + np.maximum(template_devs, 0)
+            present = ADJUSTMENT_PRESENT[rows]
+            adjusted[present] += ADJUSTMENT_ARRAY[rows[present]]
+        return adjusted
+
+    def _enforce_continuous_bins_batch(self, curves, low, high):
+        tiers = np.arange(TIER_COUNT)[None, :]
+        inside = (tiers >= low[:, None]) & (tiers <= high[:, None])
+        positive = curves > 0
+        continuous = ~(positive & ~inside).any(axis=1) & ~(inside & ~positive).any(axis=1)
+
+        total = curves[:, 0].copy()
+        for i in range(1, TIER_COUNT):
+            total += curves[:, i]
+        scale = continuous & (total > 0)
+        factor = 100.0 / np.where(scale, total, 1.0)
+        return np.where(scale[:, None], curves * factor[:, None], curves)
+
+    def _predict_uncompiled(self, base_signature_sorted, template_dev=None):
         # Step 1: Normalize bases
         norm_bases, base_offset = self._normalize_bases(base_signature_sorted)
         nt_curve = self._lookup_nt_curve(norm_bases)
@@ -51,7 +208,7 @@ class PredictorV4:
 
     def _apply_template_bias(self, curve, base_signature_sorted, template_dev):
         # Polynomial bias with TemplateDev and BaseSpread
-        coeffs = {'P': {'coef': [0.9857804543376465, 16.215169900933873, -0.434803432635146, 0.2515160864154762, -1.934475954514867], 'intercept': -43.65919500029081}, 'C': {'coef': [-36.59778833217798, -8.662165431963516, 4.794018376628289, 0.346310586617832, 1.2614632431136423], 'intercept': 65.76575893004919}, 'F': {'coef': [11.513743105906238, -10.812735828987195, -2.0607654250193193, 0.3587906760159951, 1.1842838043543824], 'intercept': 4.913411601860346}, 'X': {'coef': [20.692933641504275, -0.3602510327928754, -3.086230761379506, -0.6246098636948041, 0.16607469195316116], 'intercept': -17.660534487305497}, 'E': {'coef': [21.577718131516793, 4.507777846241174, -2.9690842100965558, -0.6108382386180624, -0.5191191885886383], 'intercept': -27.098918172607824}, 'Y': {'coef': [-18.171691336199714, -0.8847902017467351, 3.7564594874239052, 0.2787919234897869, -0.15860250328547243], 'intercept': 17.74029543992617}}
+        coeffs = TEMPLATE_BIAS_COEFFS
         d = template_dev
         s = max(base_signature_sorted) - min(base_signature_sorted)
         features = [d, s, d**2, d*s, s**2]
@@ -85,3 +242,21 @@ class PredictorV4:
             curve = {k: v * (100.0 / total) for k, v in curve.items()}
 
         return curve
+
+
+if __name__ == "__main__":
+    # Parity check: compiled and batch predictions vs curves recorded from the
+    # original implementation
+    baseline = read_signature_table(BASELINE_TABLE_PATH)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "signatures.npy")
+        PredictorV4().compile_signature_table(path)
+        predictor = PredictorV4(signature_table_path=path)
+    mismatches = check_signature_parity(baseline, predictor.predict, predictor.tier_order)
+    print(f"Signature table mismatches vs baseline: {len(mismatches)}")
+    batch_predictor = PredictorV4()
+    batch_mismatches = 0
+    for rows, bases, devs in iter_signature_groups():
+        for method in (predictor.predict_many, batch_predictor.predict_batch):
+            batch_mismatches += int((~np.all(method(bases, devs) == baseline[rows], axis=1)).sum())
+    print(f"predict_many/predict_batch mismatches vs baseline: {batch_mismatches}")
@@ -1,9 +1,14 @@
 # rules_contract_v3.py
 # Canonical ruleset upgrade with explicit tier order and min/max continuous bin validation
 
+import numpy as np
+
 QUALITY_ORDER = ["P", "C", "F", "X", "E", "Y"]
 QUALITY_MAP = {q: i for i, q in enumerate(QUALITY_ORDER)}
 REVERSE_QUALITY_MAP = {i: q for q, i in QUALITY_MAP.items()}
+OUTPUT_KEYS = ["Output_P", "Output_C", "Output_F", "Output_X", "Output_E", "Output_Y"]
+TIER_COUNT = len(QUALITY_ORDER)
+MASK_COUNT = 1 << TIER_COUNT
 
 # -----------------------------
 # Canonical Tier Functions
@@ -19,7 +24,7 @@ def tier_index(tier: str) -> int:
     return QUALITY_MAP[tier]
 
 
-def validate_min_max_continuous_bins(input_tiers: list[str], output_bins: dict[str, float]) -> bool:
+def _validate_min_max_continuous_bins_reference(input_tiers: list[str], output_bins: dict[str, float]) -> bool:
     """Validate that output bins obey the continuous min/max rule based on input tiers."""
     min_tier_idx = min(tier_index(t) for t in input_tiers)
     max_tier_idx = max(tier_index(t) for t in input_tiers)
@@ -74,7 +79,7 @@ def bases_match_nt_to_template(nt_bases: frozenset, tpl_bases: frozenset) -> boo
     return tpl_bases.issubset(nt_bases)
 
 
-def output_respects_anchor_and_range(devsig: tuple[int], outputs: dict[str, float]) -> bool:
+def _output_respects_anchor_and_range_reference(devsig: tuple[int], outputs: dict[str, float]) -> bool:
     anchor = min(devsig)
     max_dev = max(devsig)
     allowed = set(range(max_dev + 1))
@@ -86,7 +91,7 @@ def output_respects_anchor_and_range(devsig: tuple[int], outputs: dict[str, floa
     return present.issubset(allowed)
 
 
-def output_has_no_internal_gaps(outputs: dict[str, float]) -> bool:
+def _output_has_no_internal_gaps_reference(outputs: dict[str, float]) -> bool:
     bins = ["Output_P", "Output_C", "Output_F", "Output_X", "Output_E", "Output_Y"]
     started = False
     for b in bins:
@@ -100,5 +105,162 @@ def output_has_no_internal_gaps(outputs: dict[str, float]) -> bool:
     return True
 
 
+def _output_is_valid_distribution_reference(devsig: tuple[int], outputs: dict[str, float]) -> bool:
+    return _output_respects_anchor_and_range_reference(devsig, outputs) and _output_has_no_internal_gaps_reference(outputs)
+
+
+# -----------------------------
+# Compiled Rule Tables
+# -----------------------------
+# Bins reduce to a 6-bit mask of positive tiers (bit i = tier i) and, for the gap
+# rule, a mask of tiers that are exactly zero (negative/NaN bins are in neither).
+
+def _range_mask(min_idx: int, max_idx: int) -> int:
+    return ((1 << (max_idx + 1)) - 1) & ~((1 << min_idx) - 1)
+
+
+def _has_gap(positive: int, zero: int) -> bool:
+    # A zero tier with a positive tier somewhere below it and above it
+    for i in range(TIER_COUNT):
+        if zero >> i & 1 and positive & ((1 << i) - 1) and positive >> (i + 1):
+            return True
+    return False
+
+
+# CONTINUOUS_TABLE[min][max][mask]: positive tiers are exactly min..max
+CONTINUOUS_TABLE = tuple(
+    tuple(tuple(mask == _range_mask(lo, hi) for mask in range(MASK_COUNT)) for hi in range(TIER_COUNT))
+    for lo in range(TIER_COUNT)
+)
+# WITHIN_MAX_TABLE[max + 1][mask]: no positive tier above max (row 0: max < 0)
+WITHIN_MAX_TABLE = tuple(
+    tuple(not mask >> (hi + 1) for mask in range(MASK_COUNT)) if hi >= 0 else tuple(mask == 0 for mask in range(MASK_COUNT))
+    for hi in range(-1, TIER_COUNT)
+)
+# NO_GAPS_TABLE[positive][zero]
+NO_GAPS_TABLE = tuple(
+    tuple(not _has_gap(positive, zero) for zero in range(MASK_COUNT)) for positive in range(MASK_COUNT)
+)
+
+_CONTINUOUS_ARRAY = np.array(CONTINUOUS_TABLE, dtype=bool)
+_WITHIN_MAX_ARRAY = np.array(WITHIN_MAX_TABLE, dtype=bool)
+_NO_GAPS_ARRAY = np.array(NO_GAPS_TABLE, dtype=bool)
+_BIT_VALUES = 1 << np.arange(TIER_COUNT, dtype=np.int64)
+
+
+def positive_mask(bins: dict[str, float], keys: list[str] = QUALITY_ORDER) -> int:
+    mask = 0
+    for i, key in enumerate(keys):
+        if bins.get(key, 0) > 0:
+            mask |= 1 << i
+    return mask
+
+
+def zero_mask(bins: dict[str, float], keys: list[str] = QUALITY_ORDER) -> int:
+    mask = 0
+    for i, key in enumerate(keys):
+        if bins.get(key, 0.0) == 0.0:
+            mask |= 1 << i
+    return mask
+
+
+def _max_row(max_dev: int) -> int:
+    return min(max(max_dev, -1), TIER_COUNT - 1) + 1
+
+
+def validate_min_max_continuous_bins(input_tiers: list[str], output_bins: dict[str, float]) -> bool:
+    """Validate that output bins obey the continuous min/max rule based on input tiers."""
+    indices = [QUALITY_MAP[t] for t in input_tiers]
+    return CONTINUOUS_TABLE[min(indices)][max(indices)][positive_mask(output_bins)]
+
+
+def output_respects_anchor_and_range(devsig: tuple[int], outputs: dict[str, float]) -> bool:
+    return WITHIN_MAX_TABLE[_max_row(max(devsig))][positive_mask(outputs, OUTPUT_KEYS)]
+
+
+def output_has_no_internal_gaps(outputs: dict[str, float]) -> bool:
+    return NO_GAPS_TABLE[positive_mask(outputs, OUTPUT_KEYS)][zero_mask(outputs, OUTPUT_KEYS)]
+
+
 def output_is_valid_distribution(devsig: tuple[int], outputs: dict[str, float]) -> bool:
-    return output_respects_anchor_and_range(devsig, outputs) and output_has_no_internal_gaps(outputs)
+    positive = positive_mask(outputs, OUTPUT_KEYS)
+    return (WITHIN_MAX_TABLE[_max_row(max(devsig))][positive]
+            and NO_GAPS_TABLE[positive][zero_mask(outputs, OUTPUT_KEYS)])
+
+
+# -----------------------------
+# Array Versions (bins as N x 6 matrices in tier order)
+# -----------------------------
+
+def positive_masks(bins: np.ndarray) -> np.ndarray:
+    return (np.asarray(bins) > 0) @ _BIT_VALUES
+
+
+def zero_masks(bins: np.ndarray) -> np.ndarray:
+    return (np.asarray(bins) == 0.0) @ _BIT_VALUES
+
+
+def validate_min_max_continuous_bins_array(min_idx: np.ndarray, max_idx: np.ndarray, bins: np.ndarray) -> np.ndarray:
+    """Row-wise validate_min_max_continuous_bins given min/max input tier indices."""
+    return _CONTINUOUS_ARRAY[min_idx, max_idx, positive_masks(bins)]
+
+
+def output_respects_anchor_and_range_array(devsigs: np.ndarray, bins: np.ndarray) -> np.ndarray:
+    """Row-wise output_respects_anchor_and_range for devsigs [N, k]."""
+    rows = np.clip(np.asarray(devsigs).max(axis=1), -1, TIER_COUNT - 1) + 1
+    return _WITHIN_MAX_ARRAY[rows, positive_masks(bins)]
+
+
+def output_has_no_internal_gaps_array(bins: np.ndarray) -> np.ndarray:
+    return _NO_GAPS_ARRAY[positive_masks(bins), zero_masks(bins)]
+
+
+def output_is_valid_distribution_array(devsigs: np.ndarray, bins: np.ndarray) -> np.ndarray:
+    return output_respects_anchor_and_range_array(devsigs, bins) & output_has_no_internal_gaps_array(bins)
+
+
+def verify_rule_tables() -> list[tuple]:
+    """
+    Exhaustively compare the compiled rules (scalar and array) with the reference
+    implementations: every mask over every min/max range, and every bin vector over
+    {negative, 0, missing, positive} for the gap rule. Returns the mismatches.
+    """
+    mismatches = []
+    ranges = [(lo, hi) for lo in range(TIER_COUNT) for hi in range(lo, TIER_COUNT)]
+
+    for lo, hi in ranges:
+        tiers = [QUALITY_ORDER[lo], QUALITY_ORDER[hi]]
+        devsig = (lo, hi)
+        rows = np.array([[(mask >> i & 1) * 0.5 for i in range(TIER_COUNT)] for mask in range(MASK_COUNT)])
+        continuous = validate_min_max_continuous_bins_array(np.full(MASK_COUNT, lo), np.full(MASK_COUNT, hi), rows)
+        respects = output_respects_anchor_and_range_array(np.tile(devsig, (MASK_COUNT, 1)), rows)
+        for mask in range(MASK_COUNT):
+            bins = {q: rows[mask, i] for i, q in enumerate(QUALITY_ORDER)}
+            outputs = {k: rows[mask, i] for i, k in enumerate(OUTPUT_KEYS)}
+            expected = _validate_min_max_continuous_bins_reference(tiers, bins)
+            if not expected == validate_min_max_continuous_bins(tiers, bins) == continuous[mask]:
+                mismatches.append(("validate_min_max_continuous_bins", lo, hi, mask))
+            expected = _output_respects_anchor_and_range_reference(devsig, outputs)
+            if not expected == output_respects_anchor_and_range(devsig, outputs) == respects[mask]:
+                mismatches.append(("output_respects_anchor_and_range", lo, hi, mask))
+            expected = _output_is_valid_distribution_reference(devsig, outputs)
+            if expected != output_is_valid_distribution(devsig, outputs):
+                mismatches.append(("output_is_valid_distribution", lo, hi, mask))
+
+    values = (-0.5, 0.0, None, 0.5)  # None = key missing
+    combos = list(np.ndindex(*(len(values),) * TIER_COUNT))
+    rows = np.array([[0.0 if values[c] is None else values[c] for c in combo] for combo in combos])
+    no_gaps = output_has_no_internal_gaps_array(rows)
+    for row, combo in enumerate(combos):
+        outputs = {k: values[c] for k, c in zip(OUTPUT_KEYS, combo) if values[c] is not None}
+        expected = _output_has_no_internal_gaps_reference(outputs)
+        if not expected == output_has_no_internal_gaps(outputs) == no_gaps[row]:
+            mismatches.append(("output_has_no_internal_gaps", combo))
+    return mismatches
+
+
+if __name__ == "__main__":
+    mismatches = verify_rule_tables()
+    print(f"Rule table mismatches: {len(mismatches)}")
+    for mismatch in mismatches[:20]:
+        print(mismatch)
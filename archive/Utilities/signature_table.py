@@ -0,0 +1,134 @@
+# signature_table.py
+# Module: Precompiled Signature Table
+# Purpose: Evaluates a predictor once for every valid signature (sorted base tiers
+# plus optional template deviation) and serves predictions as dense array lookups.
+
+from itertools import combinations_with_replacement
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+TIER_COUNT = 6
+MIN_BASES = 1
+MAX_BASES = 5
+TEMPLATE_SLOTS = TIER_COUNT + 1  # Slot 0 = no template, slot d + 1 = template deviation d
+
+# Every sorted base signature, grouped by length
+BASE_SIGNATURES = [
+    combo
+    for k in range(MIN_BASES, MAX_BASES + 1)
+    for combo in combinations_with_replacement(range(TIER_COUNT), k)
+]
+
+# Base-6 radix code of a sorted signature -> row in BASE_SIGNATURES (-1 if unsorted)
+_LENGTH_OFFSET = np.zeros(MAX_BASES + 2, dtype=np.int64)
+for _k in range(MIN_BASES, MAX_BASES + 1):
+    _LENGTH_OFFSET[_k + 1] = _LENGTH_OFFSET[_k] + TIER_COUNT ** _k
+_BASE_ROW = np.full(int(_LENGTH_OFFSET[MAX_BASES + 1]), -1, dtype=np.int64)
+
+
+def _radix_code(bases) -> int:
+    code = 0
+    for b in bases:
+        code = code * TIER_COUNT + b
+    return int(_LENGTH_OFFSET[len(bases)]) + code
+
+
+for _row, _bases in enumerate(BASE_SIGNATURES):
+    _BASE_ROW[_radix_code(_bases)] = _row
+
+SIGNATURE_COUNT = len(BASE_SIGNATURES) * TEMPLATE_SLOTS
+
+
+def encode_signature(base_signature, template_dev: Optional[int] = None) -> int:
+    """Return the table row for a signature, or -1 if it is outside the table."""
+    bases = sorted(base_signature)
+    if not MIN_BASES <= len(bases) <= MAX_BASES or bases[0] < 0 or bases[-1] >= TIER_COUNT:
+        return -1
+    if template_dev is None:
+        slot = 0
+    elif 0 <= template_dev < TIER_COUNT:
+        slot = template_dev + 1
+    else:
+        return -1
+    return int(_BASE_ROW[_radix_code(bases)]) * TEMPLATE_SLOTS + slot
+
+
+def encode_signatures(bases: np.ndarray, template_devs: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Vectorized encode_signature for N signatures with k bases each.
+
+    Parameters:
+        bases (ndarray[N, k]): Base tiers, in any order
+        template_devs (ndarray[N] | None): Template deviation per row, -1 for no template
+
+    Returns:
+        ndarray[N] of table rows, -1 where a signature is outside the table
+    """
+    bases = np.sort(np.asarray(bases, dtype=np.int64), axis=1)
+    n, k = bases.shape
+    if template_devs is None:
+        template_devs = np.full(n, -1, dtype=np.int64)
+    template_devs = np.asarray(template_devs, dtype=np.int64)
+    if not MIN_BASES <= k <= MAX_BASES:
+        return np.full(n, -1, dtype=np.int64)
+
+    valid = (bases[:, 0] >= 0) & (bases[:, -1] < TIER_COUNT)
+    valid &= (template_devs >= -1) & (template_devs < TIER_COUNT)
+    powers = TIER_COUNT ** np.arange(k - 1, -1, -1, dtype=np.int64)
+    radix = _LENGTH_OFFSET[k] + np.where(valid[:, None], bases, 0) @ powers
+    codes = _BASE_ROW[radix] * TEMPLATE_SLOTS + template_devs + 1
+    return np.where(valid, codes, -1)
+
+
+def iter_signatures():
+    """Yield (row, base_signature, template_dev) for every table row."""
+    for base_row, bases in enumerate(BASE_SIGNATURES):
+        for slot in range(TEMPLATE_SLOTS):
+            yield base_row * TEMPLATE_SLOTS + slot, list(bases), (None if slot == 0 else slot - 1)
+
+
+def iter_signature_groups():
+    """Yield (rows, bases[N, k], template_devs[N]) per base count, template_dev -1 for none."""
+    groups = {}
+    for row, bases, template_dev in iter_signatures():
+        group = groups.setdefault(len(bases), ([], [], []))
+        group[0].append(row)
+        group[1].append(bases)
+        group[2].append(-1 if template_dev is None else template_dev)
+    for rows, bases, template_devs in groups.values():
+        yield np.array(rows), np.array(bases, dtype=np.int64), np.array(template_devs, dtype=np.int64)
+
+
+def build_signature_table(predict: Callable[[List[int], Optional[int]], Dict[str, float]],
+                          tier_order: List[str]) -> np.ndarray:
+    """Evaluate predict once per signature into a dense float array [SIGNATURE_COUNT, 6]."""
+    table = np.empty((SIGNATURE_COUNT, len(tier_order)), dtype=np.float64)
+    for row, bases, template_dev in iter_signatures():
+        curve = predict(bases, template_dev)
+        table[row] = [curve[tier] for tier in tier_order]
+    return table
+
+
+def check_signature_parity(table: np.ndarray,
+                           predict: Callable[[List[int], Optional[int]], Dict[str, float]],
+                           tier_order: List[str]) -> List[tuple]:
+    """Return (bases, template_dev) for every signature where table and predict disagree."""
+    mismatches = []
+    for row, bases, template_dev in iter_signatures():
+        curve = predict(bases, template_dev)
+        expected = np.array([curve[tier] for tier in tier_order], dtype=np.float64)
+        if not np.array_equal(table[row], expected, equal_nan=True):
+            mismatches.append((bases, template_dev))
+    return mismatches
+
+
+def save_signature_table(path: str, table: np.ndarray) -> None:
+    np.save(path, table)
+
+
+def load_signature_table(path: str) -> np.ndarray:
+    table = np.load(path)
+    if table.shape[0] != SIGNATURE_COUNT:
+        raise ValueError(f"Signature table at {path} has {table.shape[0]} rows, expected {SIGNATURE_COUNT}")
+    return table
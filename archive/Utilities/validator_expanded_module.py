@@ -1,8 +1,138 @@
 
-import json
+from itertools import islice
+from operator import itemgetter
+
+import numpy as np
+
+from expander_module import iter_json_records
 
 # Canonical tier order
 TIERS = ["P", "C", "F", "X", "E", "Y"]
+MAX_TIER = len(TIERS) - 1
+
+REQUIRED_FIELDS = [
+    "Recipe", "BaseSignatureSorted", "TemplateDevAbsolute", "TemplateDevRelative",
+    "TemplatePresent", "OutputBins", "IsNormalized", "ShiftValue", "OriginalRecipe"
+]
+
+_REQUIRED_SET = frozenset(REQUIRED_FIELDS)
+_bins_getter = itemgetter(*TIERS)
+_NAN_BINS = [np.nan] * len(TIERS)
+
+# Rows are converted to columns and checked this many at a time
+VALIDATION_CHUNK_SIZE = 1_000_000
+
+def columns_from_records(records):
+    '''
+    Load expanded entries into columnar arrays:
+    - missing: bool [N, len(REQUIRED_FIELDS)], True where a field is absent
+    - tiers / offsets: every row's bases followed by its template deviation,
+      flattened, with offsets[i] the start of row i
+    - bins: float [N, 6] output bins in tier order (NaN where absent)
+    - checkable: bool [N], rows that have bases, template and bins
+    '''
+    tiers = []
+    offsets = []
+    bins = []
+    incomplete = []  # (row, missing field flags) for rows lacking a required field
+    unchecked = []
+
+    for row, e in enumerate(records):
+        if not _REQUIRED_SET <= e.keys():
+            incomplete.append((row, [field not in e for field in REQUIRED_FIELDS]))
+        offsets.append(len(tiers))
+        bases = e.get("BaseSignatureSorted")
+        template = e.get("TemplateDevAbsolute")
+        output_bins = e.get("OutputBins")
+        if bases is None or template is None or output_bins is None:
+            tiers.append(0)  # Keeps the row's segment non-empty
+            bins.extend(_NAN_BINS)
+            unchecked.append(row)
+            continue
+        tiers.extend(bases)
+        tiers.append(template)
+        try:
+            bins.extend(_bins_getter(output_bins))
+        except KeyError:
+            bins.extend(output_bins.get(tier, np.nan) for tier in TIERS)
+
+    n = len(offsets)
+    missing = np.zeros((n, len(REQUIRED_FIELDS)), dtype=bool)
+    for row, flags in incomplete:
+        missing[row] = flags
+    checkable = np.ones(n, dtype=bool)
+    checkable[unchecked] = False
+    return {
+        "missing": missing,
+        "tiers": np.array(tiers, dtype=np.int64),
+        "offsets": np.array(offsets, dtype=np.int64),
+        "bins": np.array(bins, dtype=np.float64).reshape(n, len(TIERS)),
+        "checkable": checkable,
+    }
+
+def validate_columns(columns):
+    '''
+    Run all checks as masks over a column set from columns_from_records.
+    Returns counts and offending row indices; counts follow the per-entry
+    validator (missing fields and zero bins are counted individually).
+    '''
+    missing = columns["missing"]
+    checkable = columns["checkable"]
+    n = len(checkable)
+    if n == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return {
+            "total_entries": 0, "invalid_tiers": 0, "continuity_errors": 0, "missing_fields": 0,
+            "invalid_tier_rows": empty, "continuity_error_rows": empty, "missing_field_rows": empty
+        }
+
+    # Per-row min/max over bases + template
+    row_min = np.minimum.reduceat(columns["tiers"], columns["offsets"])
+    row_max = np.maximum.reduceat(columns["tiers"], columns["offsets"])
+
+    # Tier limit check
+    invalid_tier = checkable & (row_max > MAX_TIER)
+
+    # Continuity check: zero bins inside [min, max]
+    tier_index = np.arange(len(TIERS))
+    in_range = (tier_index >= row_min[:, None]) & (tier_index <= row_max[:, None])
+    zero_bins = (columns["bins"] == 0.0) & in_range & checkable[:, None]
+    zero_counts = zero_bins.sum(axis=1)
+
+    missing_counts = missing.sum(axis=1)
+
+    return {
+        "total_entries": n,
+        "invalid_tiers": int(np.count_nonzero(invalid_tier)),
+        "continuity_errors": int(zero_counts.sum()),
+        "missing_fields": int(missing_counts.sum()),
+        "invalid_tier_rows": np.flatnonzero(invalid_tier),
+        "continuity_error_rows": np.flatnonzero(zero_counts),
+        "missing_field_rows": np.flatnonzero(missing_counts),
+    }
+
+def validate_expanded_records(records, chunk_size=VALIDATION_CHUNK_SIZE):
+    '''
+    Validate an iterable of expanded entries chunk by chunk, so memory is
+    bounded by chunk_size rather than dataset size. Row indices are global.
+    '''
+    records = iter(records)
+    totals = {"total_entries": 0, "invalid_tiers": 0, "continuity_errors": 0, "missing_fields": 0}
+    rows = {"invalid_tier_rows": [], "continuity_error_rows": [], "missing_field_rows": []}
+
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        result = validate_columns(columns_from_records(chunk))
+        for key in rows:
+            rows[key].append(result[key] + totals["total_entries"])
+        for key in totals:
+            totals[key] += result[key]
+
+    for key, parts in rows.items():
+        totals[key] = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+    return totals
 
 def validate_expanded_dataset(input_path):
     '''
@@ -10,46 +140,9 @@ def validate_expanded_dataset(input_path):
     - No tier > 5
     - Continuous bins between min and max
     - Proper fields present
+    Accepts a JSON array or JSON Lines file.
     '''
-    with open(input_path) as f:
-        expanded_data = json.load(f)
-
-    invalid_tiers = []
-    bins_errors = []
-    missing_fields = []
-
-    required_fields = [
-        "Recipe", "BaseSignatureSorted", "TemplateDevAbsolute", "TemplateDevRelative",
-        "TemplatePresent", "OutputBins", "IsNormalized", "ShiftValue", "OriginalRecipe"
-    ]
-
-    for e in expanded_data:
-        # Check required fields
-        for field in required_fields:
-            if field not in e:
-                missing_fields.append({"Recipe": e.get("Recipe", None), "MissingField": field})
-
-        # Tier limit check
-        if any(v > 5 for v in e["BaseSignatureSorted"]) or e["TemplateDevAbsolute"] > 5:
-            invalid_tiers.append(e)
-
-        # Continuity check
-        min_val = min(e["BaseSignatureSorted"] + [e["TemplateDevAbsolute"]])
-        max_val = max(e["BaseSignatureSorted"] + [e["TemplateDevAbsolute"]])
-        for idx, tier in enumerate(TIERS[min_val:max_val+1], start=min_val):
-            if e["OutputBins"][tier] == 0.0:
-                bins_errors.append({
-                    "Recipe": e["Recipe"],
-                    "ShiftValue": e["ShiftValue"],
-                    "Issue": f"Zero bin within continuous range {tier}"
-                })
-
-    return {
-        "total_entries": len(expanded_data),
-        "invalid_tiers": len(invalid_tiers),
-        "continuity_errors": len(bins_errors),
-        "missing_fields": len(missing_fields)
-    }
+    return validate_expanded_records(iter_json_records(input_path))
 
 # Usage Example:
 # results = validate_expanded_dataset("3mat_template_EXPANDED.json")
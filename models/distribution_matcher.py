@@ -1,14 +1,8 @@
-
-from collections import defaultdict
-
-class DistributionMatcher:
-    def __init__(self):
-        self.templates = defaultdict(list)
-
-    def add_template(self, materials, distribution):
-        key = tuple(sorted(materials))
-        self.templates[key].append(distribution)
-
-    def match_distribution(self, materials):
-        key = tuple(sorted(materials))
-        return self.templates.get(key, [])
+from modules.models.distribution_matcher import (
+    COUNT_BITS,
+    MAX_MATERIALS,
+    material_key,
+    DistributionMatcher
+)
+
+__all__ = ["COUNT_BITS", "MAX_MATERIALS", "material_key", "DistributionMatcher"]
@@ -0,0 +1,116 @@
+# compact_patterns.py
+# Compact pattern representation: W/L/M results packed 2 bits per symbol into
+# one int behind a leading 1 bit that tags the length, plus a slotted record.
+
+import random
+import tracemalloc
+from itertools import product
+
+SYMBOL_CODES = {"W": 0, "L": 1, "M": 2}
+CODE_SYMBOLS = "WLM"
+
+def symbol_code(result):
+    """Map a session result to its 2-bit code; any mid quality counts as M."""
+    return SYMBOL_CODES.get(result, 2)
+
+def encode_pattern(pattern):
+    key = 1
+    for result in pattern:
+        key = (key << 2) | symbol_code(result)
+    return key
+
+def decode_pattern(key):
+    symbols = []
+    while key > 1:
+        symbols.append(CODE_SYMBOLS[key & 3])
+        key >>= 2
+    return ''.join(reversed(symbols))
+
+def pattern_length(key):
+    return (key.bit_length() - 1) // 2
+
+def suffix_keys(session_data, end, min_length, max_length):
+    """Yield (length, key) for each pattern ending at session_data[end], in O(max_length)."""
+    packed = 0
+    for length in range(1, min(max_length, end + 1) + 1):
+        packed |= symbol_code(session_data[end - length + 1]) << (2 * (length - 1))
+        if length >= min_length:
+            yield length, (1 << (2 * length)) | packed
+
+def key_from_string(pattern_str):
+    """Convert a sanitized Firebase key such as "WLMW" to its packed int key."""
+    return encode_pattern(pattern_str)
+
+def key_to_string(key):
+    """Convert a packed int key back to its Firebase string key."""
+    return decode_pattern(key)
+
+# Engine patterns are stored in shards named after the (up to) SHARD_SYMBOLS
+# symbols just before a pattern's last result. Lookups are anchored at the
+# session tail, so all patterns continuing a given history share one shard.
+SHARD_SYMBOLS = 2
+SHARD_PREFIX = "_"  # Keeps shard names apart from flat pattern keys
+
+def shard_of(key):
+    """Shard name for a packed pattern key, e.g. "WLMW" -> "_LM"."""
+    context = key >> 2
+    length = min(pattern_length(context), SHARD_SYMBOLS)
+    tail = context & ((1 << (2 * length)) - 1)
+    return SHARD_PREFIX + decode_pattern((1 << (2 * length)) | tail)
+
+def history_shards(history, min_context=0):
+    """Shards holding every pattern whose context is a suffix of history
+    at least min_context symbols long."""
+    tail = ''.join(CODE_SYMBOLS[symbol_code(r)] for r in history[-SHARD_SYMBOLS:])
+    shards = [SHARD_PREFIX + tail[len(tail) - n:] for n in range(min_context, SHARD_SYMBOLS) if n <= len(history)]
+    if len(history) >= max(min_context, SHARD_SYMBOLS):
+        shards.append(SHARD_PREFIX + tail)
+    return shards
+
+ALL_SHARDS = [
+    SHARD_PREFIX + ''.join(symbols)
+    for n in range(SHARD_SYMBOLS + 1)
+    for symbols in product(CODE_SYMBOLS, repeat=n)
+]
+
+
+class PatternRecord:
+    __slots__ = ("count", "last_seen", "tick", "source")
+
+    def __init__(self, count=0, last_seen=0, tick=0, source="engine"):
+        self.count = count
+        self.last_seen = last_seen
+        self.tick = tick
+        self.source = source
+
+
+def measure_bytes_per_pattern(n=100_000, min_length=3, max_length=8, seed=0):
+    """Compare memory of tuple/dict entries with int/PatternRecord entries."""
+    rng = random.Random(seed)
+    patterns = [
+        ''.join(rng.choice(CODE_SYMBOLS) for _ in range(rng.randint(min_length, max_length)))
+        for _ in range(n)
+    ]
+
+    def measure(build):
+        tracemalloc.start()
+        store = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return size / len(store)
+
+    def build_tuples():
+        return {
+            tuple(p): {"count": 1.0, "last_seen": i, "age": 0, "source": "engine"}
+            for i, p in enumerate(patterns)
+        }
+
+    def build_packed():
+        return {encode_pattern(p): PatternRecord(1.0, i, 0) for i, p in enumerate(patterns)}
+
+    return {"tuple_dict": measure(build_tuples), "packed_slots": measure(build_packed)}
+
+
+if __name__ == "__main__":
+    for name, size in measure_bytes_per_pattern().items():
+        print(f"{name}: {size:.1f} bytes/pattern")
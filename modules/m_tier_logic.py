@@ -1,9 +1,18 @@
-
 # m_tier_logic.py
 
+from itertools import combinations_with_replacement
+import numpy as np
+
 QUALITY_SCORES = {"P": 1, "C": 2, "R": 3, "X": 4, "E": 5, "Y": 6}
+QUALITY_LABELS = sorted(QUALITY_SCORES, key=QUALITY_SCORES.get)
+TIER_COUNT = len(QUALITY_LABELS)
+MAX_TABLE_MATERIALS = 5
 
-def classify_result(materials, result_quality):
+CLASS_LABELS = ["W", "L", "M1", "M2", "M3", "M4", "M5", "M?"]
+_CLASS_ARRAY = np.array(CLASS_LABELS)
+_CLASS_CODES = {label: code for code, label in enumerate(CLASS_LABELS)}
+
+def _classify_result_reference(materials, result_quality):
     values = sorted(QUALITY_SCORES[q] for q in materials)
     min_val, max_val = values[0], values[-1]
     result_score = QUALITY_SCORES[result_quality]
@@ -17,3 +26,67 @@ def classify_result(materials, result_quality):
     else:
         mid_index = values.index(result_score) if result_score in values else -1
         return f"M{mid_index + 1}" if mid_index != -1 else "M?"
+
+def _multiset_key(materials):
+    # 3-bit count per tier; order-free
+    key = 0
+    for q in materials:
+        key += 1 << (3 * (QUALITY_SCORES[q] - 1))
+    return key
+
+# (material multiset key, result quality) -> class, for every multiset of 1..5 materials
+_CLASSIFICATION = {}
+# k -> [6^k * 6] class codes indexed by (base-6 code of sorted tier indices) * 6 + result
+_BATCH_TABLES = {}
+for _k in range(1, MAX_TABLE_MATERIALS + 1):
+    _table = np.full(TIER_COUNT ** _k * TIER_COUNT, _CLASS_CODES["M?"], dtype=np.int8)
+    for _combo in combinations_with_replacement(range(TIER_COUNT), _k):
+        _materials = [QUALITY_LABELS[i] for i in _combo]
+        _code = 0
+        for _i in _combo:
+            _code = _code * TIER_COUNT + _i
+        for _r, _result in enumerate(QUALITY_LABELS):
+            _label = _classify_result_reference(_materials, _result)
+            _CLASSIFICATION[(_multiset_key(_materials), _result)] = _label
+            _table[_code * TIER_COUNT + _r] = _CLASS_CODES[_label]
+    _BATCH_TABLES[_k] = _table
+
+def classify_result(materials, result_quality):
+    if len(materials) <= MAX_TABLE_MATERIALS:
+        label = _CLASSIFICATION.get((_multiset_key(materials), result_quality))
+        if label is not None:
+            return label
+    return _classify_result_reference(materials, result_quality)
+
+def _tier_indices(values):
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        indices = values.astype(np.int64)
+        bad = (indices < 0) | (indices >= TIER_COUNT)
+        if bad.any():
+            raise KeyError(f"Unknown tier index in {np.unique(indices[bad]).tolist()}")
+        return indices
+    indices = np.full(values.shape, -1, dtype=np.int64)
+    for i, q in enumerate(QUALITY_LABELS):
+        indices[values == q] = i
+    if (indices < 0).any():
+        raise KeyError(f"Unknown quality label in {np.unique(values[indices < 0]).tolist()}")
+    return indices
+
+def classify_results(materials, results):
+    """
+    Vectorized classify_result for a whole history.
+
+    materials: [N, k] labels or tier indices (0 = P .. 5 = Y), k <= 5
+    results: [N] crafted qualities, labels or tier indices
+    Returns an [N] array of class labels (W, L, M1..M5, M?).
+    """
+    tiers = np.sort(_tier_indices(materials), axis=1)
+    result_tiers = _tier_indices(results)
+    k = tiers.shape[1]
+    if k not in _BATCH_TABLES:
+        return np.array([classify_result([QUALITY_LABELS[i] for i in row], QUALITY_LABELS[r])
+                         for row, r in zip(tiers, result_tiers)])
+    powers = TIER_COUNT ** np.arange(k - 1, -1, -1, dtype=np.int64)
+    codes = (tiers @ powers) * TIER_COUNT + result_tiers
+    return _CLASS_ARRAY[_BATCH_TABLES[k][codes]]
@@ -14,4 +14,56 @@ def generate_pattern_variants(pattern):
     for i in range(1, len(pattern)):
         variants.add(rotate_pattern(pattern, i))
         variants.add(invert_pattern(rotate_pattern(pattern, i)))
-    return variants
\ No newline at end of file
+    return variants
+
+def least_rotation(pattern):
+    """Booth's algorithm: offset of the lexicographically least rotation, in O(n)."""
+    doubled = pattern + pattern
+    failure = [-1] * len(doubled)
+    k = 0
+    for j in range(1, len(doubled)):
+        char = doubled[j]
+        i = failure[j - k - 1]
+        while i != -1 and char != doubled[k + i + 1]:
+            if char < doubled[k + i + 1]:
+                k = j - i - 1
+            i = failure[i]
+        if char != doubled[k + i + 1]:
+            if char < doubled[k]:
+                k = j
+            failure[j - k] = -1
+        else:
+            failure[j - k] = i + 1
+    return k
+
+def canonical_pattern(pattern):
+    """Key shared by a pattern and every variant from generate_pattern_variants."""
+    inverted = invert_pattern(pattern)
+    return min(
+        rotate_pattern(pattern, least_rotation(pattern)),
+        rotate_pattern(inverted, least_rotation(inverted))
+    )
+
+class VariantIndex:
+    """Known patterns keyed by canonical form, so variant lookups are one hash probe."""
+
+    def __init__(self):
+        self._known = {}
+
+    def add(self, pattern):
+        self._known.setdefault(canonical_pattern(pattern), pattern)
+
+    def discard(self, pattern):
+        key = canonical_pattern(pattern)
+        if self._known.get(key) == pattern:
+            del self._known[key]
+
+    def find_variant(self, pattern):
+        """Return the known pattern that is a rotation/inversion of pattern, or None."""
+        return self._known.get(canonical_pattern(pattern))
+
+    def __contains__(self, pattern):
+        return canonical_pattern(pattern) in self._known
+
+    def __len__(self):
+        return len(self._known)
@@ -1,14 +1,85 @@
+import numpy as np
+
+from ..material_constants import QUALITY_LABELS
+
+COUNT_BITS = 4
+MAX_MATERIALS = (1 << COUNT_BITS) - 1
+_TIER_INCREMENT = {q: 1 << (COUNT_BITS * i) for i, q in enumerate(QUALITY_LABELS)}
+
+
+def material_key(materials):
+    """Pack a multiset of material tiers into one int (4-bit count per tier), order-free."""
+    if len(materials) > MAX_MATERIALS:
+        raise ValueError(f"At most {MAX_MATERIALS} materials per template")
+    key = 0
+    for q in materials:
+        key += _TIER_INCREMENT[q]
+    return key
+
+
+def _grow(array, needed):
+    if needed <= len(array):
+        return array
+    grown = np.zeros((max(needed, 2 * len(array)),) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
 
-from collections import defaultdict
 
 class DistributionMatcher:
-    def __init__(self):
-        self.templates = defaultdict(list)
+    def __init__(self, capacity=64):
+        self._capacity = capacity
+        self._slots = {}  # material key -> slot
+        self._rows = []  # slot -> row indices into distributions
+        self.distributions = None  # Contiguous [rows, width] storage
+        self.size = 0
+        self.sums = None  # Running per-slot sums, [slots, width]
+        self.counts = np.zeros(capacity, dtype=np.int64)
 
     def add_template(self, materials, distribution):
-        key = tuple(sorted(materials))
-        self.templates[key].append(distribution)
+        row = np.asarray(distribution, dtype=np.float64)
+        if self.distributions is None:
+            self.distributions = np.zeros((self._capacity, len(row)))
+            self.sums = np.zeros((self._capacity, len(row)))
+        elif len(row) != self.distributions.shape[1]:
+            raise ValueError(f"Expected a distribution of length {self.distributions.shape[1]}")
+
+        key = material_key(materials)
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = len(self._rows)
+            self._rows.append([])
+            self.sums = _grow(self.sums, slot + 1)
+            self.counts = _grow(self.counts, slot + 1)
+
+        self.distributions = _grow(self.distributions, self.size + 1)
+        self.distributions[self.size] = row
+        self._rows[slot].append(self.size)
+        self.size += 1
+        self.sums[slot] += row
+        self.counts[slot] += 1
 
     def match_distribution(self, materials):
-        key = tuple(sorted(materials))
-        return self.templates.get(key, [])
+        rows = self.match_array(materials)
+        return rows.tolist() if rows is not None else []
+
+    def match_array(self, materials):
+        """Copy of the stored distributions for these materials as an [n, width] array, or None."""
+        slot = self._slots.get(material_key(materials))
+        if slot is None:
+            return None
+        return self.distributions[self._rows[slot]]
+
+    def match_average(self, materials):
+        """Normalized average of the matched distributions, from running sums (O(1))."""
+        slot = self._slots.get(material_key(materials))
+        if slot is None:
+            return []
+        summed = self.sums[slot].tolist()
+        total = sum(summed)
+        if total == 0:
+            return [0] * len(summed)
+        return [round(val / total, 6) for val in summed]
+
+    def match_count(self, materials):
+        slot = self._slots.get(material_key(materials))
+        return 0 if slot is None else int(self.counts[slot])
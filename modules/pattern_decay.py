@@ -1,13 +1,81 @@
+import heapq
+from .pattern_table import PatternTable
+
 class PatternDecay:
+    """Lazy decay over a dict of pattern metadata.
+
+    Metadata keeps the tick of its last touch and its confidence as of that
+    tick; age and confidence are computed on read. apply_decay advances the
+    tick and only visits patterns reaching max_age, through a min-heap keyed
+    on last touch. Metadata in the old eager form ('age' instead of 'tick')
+    is converted the first time apply_decay or touch sees it.
+    """
+
     def __init__(self, decay_rate=0.95, max_age=200):
         self.decay_rate = decay_rate
         self.max_age = max_age
+        self.tick = 0
+        self._expiry = []  # Min-heap of (touch tick, pattern); stale entries are skipped
+        self._tracked = set()  # Patterns already in the tick form
 
-    def apply_decay(self, patterns):
-        for pattern, metadata in patterns.items():
-            metadata['age'] += 1
-            if metadata['age'] > self.max_age:
-                metadata['active'] = False
+    def apply_decay(self, patterns, prune=False):
+        """Advance one decay step; expired patterns are deactivated, or removed if prune."""
+        if isinstance(patterns, PatternTable):
+            patterns.apply_decay(self.decay_rate, self.max_age)
+            return patterns
+        self._adopt(patterns)
+        self.tick += 1
+        while self._expiry and self.tick - self._expiry[0][0] > self.max_age:
+            tick, pattern = heapq.heappop(self._expiry)
+            metadata = patterns.get(pattern)
+            if metadata is None or metadata['tick'] != tick:
+                continue  # Touched again since this entry was pushed
+            if prune:
+                del patterns[pattern]
+                self._tracked.discard(pattern)
             else:
-                metadata['confidence'] *= self.decay_rate
-        return patterns
\ No newline at end of file
+                metadata['active'] = False
+        return patterns
+
+    def touch(self, patterns, pattern, confidence=None):
+        """Record a hit at the current tick; confidence defaults to the decayed value."""
+        metadata = patterns.get(pattern)
+        if confidence is None:
+            confidence = self.current_confidence(metadata) if metadata else 0.0
+        if metadata is None or metadata.get('tick') != self.tick or not metadata.get('active', True):
+            heapq.heappush(self._expiry, (self.tick, pattern))
+        patterns[pattern] = {'confidence': confidence, 'tick': self.tick, 'active': True}
+        self._tracked.add(pattern)
+        return patterns[pattern]
+
+    def age(self, metadata):
+        if 'tick' not in metadata:
+            return metadata['age']
+        return self.tick - metadata['tick']
+
+    def current_confidence(self, metadata):
+        if 'tick' not in metadata:
+            return metadata['confidence']  # Eager form: already decayed
+        return metadata['confidence'] * self.decay_rate ** min(self.age(metadata), self.max_age)
+
+    def _adopt(self, patterns):
+        """Bring patterns added or removed outside touch/apply_decay under tracking.
+
+        Only scans when the tracked set and the dict disagree in size, so
+        steady-state steps stay proportional to the expiring patterns.
+        """
+        if len(patterns) == len(self._tracked):
+            return
+        self._tracked &= patterns.keys()
+        for pattern, metadata in patterns.items():
+            if pattern in self._tracked:
+                continue
+            if 'tick' not in metadata:
+                age = metadata.pop('age', 0)
+                factor = self.decay_rate ** min(age, self.max_age)
+                metadata['confidence'] = metadata['confidence'] / factor if factor else 0.0
+                metadata['tick'] = self.tick - age
+                metadata.setdefault('active', age <= self.max_age)
+            self._tracked.add(pattern)
+            if metadata.get('active', True):
+                heapq.heappush(self._expiry, (metadata['tick'], pattern))
@@ -1,22 +1,55 @@
 # pattern_engine.py
-from collections import defaultdict, Counter
 from .utils import normalize_pattern
 
+class OutcomeRing:
+    """Fixed-capacity window of recent outcomes with running per-outcome counts."""
+    __slots__ = ("buffer", "head", "size", "counts")
+
+    def __init__(self, capacity):
+        self.buffer = [None] * capacity
+        self.head = 0  # Index of the oldest outcome once full
+        self.size = 0
+        self.counts = {}
+
+    def push(self, outcome):
+        if self.size == len(self.buffer):
+            evicted = self.buffer[self.head]
+            remaining = self.counts[evicted] - 1
+            if remaining:
+                self.counts[evicted] = remaining
+            else:
+                del self.counts[evicted]
+        else:
+            self.size += 1
+        self.buffer[self.head] = outcome
+        self.head = (self.head + 1) % len(self.buffer)
+        self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+    def outcomes(self):
+        """Outcomes oldest first."""
+        if self.size < len(self.buffer):
+            return self.buffer[:self.size]
+        return self.buffer[self.head:] + self.buffer[:self.head]
+
+
 class PatternEngine:
     def __init__(self):
-        self.patterns = defaultdict(list)
+        self.patterns = {}
         self.max_age = 200
         self.decay_rate = 0.95
 
     def record_outcome(self, pattern_key, outcome):
-        self.patterns[pattern_key].append(outcome)
-        if len(self.patterns[pattern_key]) > self.max_age:
-            self.patterns[pattern_key] = self.patterns[pattern_key][-self.max_age:]
+        ring = self.patterns.get(pattern_key)
+        if ring is None:
+            ring = self.patterns[pattern_key] = OutcomeRing(self.max_age)
+        ring.push(outcome)
 
     def get_prediction(self, pattern_key):
-        outcomes = self.patterns.get(pattern_key, [])
-        if not outcomes:
+        ring = self.patterns.get(pattern_key)
+        if ring is None or not ring.size:
             return None
-        counter = Counter(outcomes)
-        total = sum(counter.values())
-        return {k: v / total for k, v in counter.items()}
\ No newline at end of file
+        total = ring.size
+        return {k: v / total for k, v in ring.counts.items()}
+
+    def get_predictions(self, pattern_keys):
+        return {key: self.get_prediction(key) for key in pattern_keys}
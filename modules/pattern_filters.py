@@ -1,3 +1,5 @@
+from .pattern_table import PatternTable
+
 def filter_invalid_patterns(patterns, gear_type, valid_lengths):
     return [
         p for p in patterns
@@ -5,6 +7,10 @@ def filter_invalid_patterns(patterns, gear_type, valid_lengths):
     ]
 
 def age_and_decay_patterns(patterns, decay_rate=0.95, max_age=200):
+    """One-shot aging pass over every pattern; keeps no state between calls.
+    For repeated steps use PatternDecay, which decays lazily."""
+    if isinstance(patterns, PatternTable):
+        return patterns.age_and_decay(decay_rate, max_age)
     aged_patterns = {}
     for pattern, data in patterns.items():
         data['age'] += 1
@@ -1,80 +1,373 @@
 # pattern_manager.py
 
+import heapq
+import logging
+import threading
+import time
 from collections import defaultdict
 from .constants import MIN_PATTERN_LENGTH, MAX_PATTERN_LENGTH, PATTERN_DECAY_RATE, PATTERN_MAX_AGE
+from .compact_patterns import (
+    ALL_SHARDS,
+    SHARD_PREFIX,
+    PatternRecord,
+    encode_pattern,
+    history_shards,
+    key_from_string,
+    key_to_string,
+    pattern_length,
+    shard_of,
+    suffix_keys
+)
+from .suffix_index import SuffixIndex
 from modules.utils.firebase_utils import (
-    retrieve_user_patterns,
+    ENGINE_LAYOUT_SHARDED,
+    mark_engine_patterns_sharded,
+    retrieve_user_patterns_async,
+    retrieve_engine_layout_async,
     retrieve_engine_patterns,
-    upload_engine_patterns,
+    retrieve_engine_shard_async,
+    retrieve_engine_tick,
+    update_engine_patterns,
     sanitize_pattern
 )
 
+logger = logging.getLogger(__name__)
+
+SYNC_DEBOUNCE_SECONDS = 2.0   # Quiet period before changed patterns are uploaded
+SYNC_MAX_DELAY_SECONDS = 10.0  # Upper bound on how long a change may stay unsynced
+SYNC_RETRY_MAX_SECONDS = 60.0  # Backoff cap when an upload keeps failing
+
 class PatternManager:
-    def __init__(self):
-        self.pattern_store = defaultdict(lambda: {"count": 0, "last_seen": 0, "age": 0, "source": "engine"})
-        self._load_user_patterns()
-        self._load_engine_patterns()
-
-    def _load_user_patterns(self):
-        """Load sanitized user-submitted patterns from Firebase with lower confidence."""
-        user_patterns = retrieve_user_patterns()
-        for pattern_str in user_patterns:
-            pattern = tuple(sanitize_pattern(pattern_str))
-            self.pattern_store[pattern] = {
-                "count": 0.5,
-                "last_seen": -1,
-                "age": 0,
-                "source": "user"
-            }
-
-    def _load_engine_patterns(self):
-        """Load internal (engine-detected) patterns from Firebase."""
-        engine_data = retrieve_engine_patterns()
-        for pattern_str, data in engine_data.items():
-            pattern = tuple(sanitize_pattern(pattern_str))
-            self.pattern_store[pattern] = {
-                "count": float(data.get("count", 1)),
-                "last_seen": int(data.get("last_seen", 0)),
-                "age": int(data.get("age", 0)),
-                "source": "engine"
-            }
+    def __init__(self, prefetch=True):
+        # Keys are packed ints (see compact_patterns). Engine counts decay
+        # lazily: a record's count is the value as of its tick, the decay
+        # tick of the last touch, and reads apply the missing decay steps.
+        self.pattern_store = defaultdict(PatternRecord)
+        self.suffix_index = SuffixIndex()  # Context -> continuation lookups over pattern_store
+        self._processed = 0  # Number of session results already mined
+        self._tick = retrieve_engine_tick()
+        self._expiry = []  # Min-heap of (touch tick, pattern); stale entries are skipped
+        self._dirty = set()  # Patterns changed or expired since the last sync
+        self._legacy_keys = set()  # Flat engine_patterns keys to delete once resharded
+        self._dirty_since = None
+        self._flush_timer = None
+        self._retry_delay = SYNC_DEBOUNCE_SECONDS
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()  # Serializes uploads so an older snapshot never lands last
+        # Engine patterns load one shard at a time, on first use. A background
+        # prefetch fills in the remaining shards, migrates flat legacy entries
+        # and then loads user patterns. Until then, patterns first counted
+        # here are tracked so a user pattern can still claim them.
+        self._loaded_shards = set()
+        self._user_patterns_loaded = False
+        self._local_only = set()
+        self._prefetched = threading.Event()
+        if prefetch:
+            threading.Thread(target=self.prefetch_patterns, daemon=True).start()
+
+    def prefetch_patterns(self):
+        """Load every engine shard not loaded yet, legacy flat entries if the
+        store has not been migrated, and then user patterns."""
+        try:
+            user_patterns = retrieve_user_patterns_async()
+            layout = retrieve_engine_layout_async()
+            self._ensure_shards(ALL_SHARDS)
+            if layout.result() != ENGINE_LAYOUT_SHARDED:
+                self._load_legacy_patterns(retrieve_engine_patterns())
+            self._load_user_patterns(user_patterns.result())
+        finally:
+            self._prefetched.set()
+
+    def wait_until_loaded(self, timeout=None):
+        return self._prefetched.wait(timeout)
+
+    def _load_user_patterns(self, user_patterns):
+        """Add sanitized user-submitted patterns with lower confidence.
+
+        Engine data from Firebase takes precedence. A pattern only counted
+        locally before this load becomes a user pattern again, as it would
+        have been had the load come first, and its engine copy is deleted on
+        the next sync.
+        """
+        with self._lock:
+            for pattern_str in user_patterns:
+                pattern = key_from_string(sanitize_pattern(pattern_str))
+                if pattern_length(pattern) < MIN_PATTERN_LENGTH:
+                    continue  # Legacy submissions may sanitize to "" or a too-short pattern
+                if pattern in self.pattern_store:
+                    if pattern not in self._local_only:
+                        continue
+                    self._dirty.add(pattern)
+                else:
+                    self.suffix_index.add(pattern)
+                self.pattern_store[pattern] = PatternRecord(count=0.5, last_seen=-1, source="user")
+            self._local_only.clear()
+            self._user_patterns_loaded = True
+        self._save_engine_patterns()
+
+    def _load_legacy_patterns(self, engine_data):
+        """Move entries still in the old flat engine_patterns layout into their shard.
+
+        Flat keys are raw session results ("WPWL"); quality letters count as
+        M. Their counts are merged into any record already loaded or counted
+        for the same pattern, and the flat keys are deleted on the next sync.
+        """
+        with self._lock:
+            for name, data in engine_data.items():
+                if name.startswith(SHARD_PREFIX):
+                    continue
+                self._legacy_keys.add(name)
+                pattern = encode_pattern(name)
+                if pattern_length(pattern) < MIN_PATTERN_LENGTH:
+                    continue  # Deleted on the next sync
+                self._merge_record(pattern, data)
+            migrated = not self._legacy_keys
+        if migrated:
+            mark_engine_patterns_sharded()
+        self._save_engine_patterns()
+
+    def _merge_record(self, pattern, data):
+        existing = self.pattern_store.get(pattern)
+        if existing is None or existing.source == "user":
+            self._ingest_record(pattern, data)
+        else:
+            tick = self._record_tick(data)
+            merged_tick = max(existing.tick, tick)
+            existing.count = (existing.count * PATTERN_DECAY_RATE ** (merged_tick - existing.tick)
+                              + float(data.get("count", 1)) * PATTERN_DECAY_RATE ** (merged_tick - tick))
+            existing.last_seen = max(existing.last_seen, int(data.get("last_seen", 0)))
+            if merged_tick != existing.tick:
+                existing.tick = merged_tick
+                heapq.heappush(self._expiry, (merged_tick, pattern))
+        self._local_only.discard(pattern)
+        self._dirty.add(pattern)
+
+    def _ensure_shards(self, shards):
+        """Fetch the shards not loaded yet, concurrently and without holding the lock."""
+        pending = {
+            shard: retrieve_engine_shard_async(shard)
+            for shard in set(shards) if shard not in self._loaded_shards
+        }
+        for shard, entries in pending.items():
+            entries = entries.result()
+            with self._lock:
+                if shard not in self._loaded_shards:
+                    self._ingest_shard(shard, entries)
+
+    def _ingest_shard(self, shard, entries):
+        for pattern_str, data in entries.items():
+            pattern = key_from_string(sanitize_pattern(pattern_str))
+            if pattern_length(pattern) >= MIN_PATTERN_LENGTH:
+                self._ingest_record(pattern, data)
+        self._loaded_shards.add(shard)
+
+    def _record_tick(self, data):
+        tick = int(data["tick"]) if "tick" in data else self._tick - int(data.get("age", 0))
+        return min(tick, self._tick)  # A tick from the future would grow the count on read
+
+    def _ingest_record(self, pattern, data):
+        tick = self._record_tick(data)
+        if pattern not in self.pattern_store:
+            self.suffix_index.add(pattern)
+        self.pattern_store[pattern] = PatternRecord(
+            count=float(data.get("count", 1)),
+            last_seen=int(data.get("last_seen", 0)),
+            tick=tick
+        )
+        heapq.heappush(self._expiry, (tick, pattern))
 
     def update_patterns(self, session_data):
-        for length in range(MIN_PATTERN_LENGTH, min(MAX_PATTERN_LENGTH + 1, len(session_data))):
-            for i in range(len(session_data) - length + 1):
-                pattern = tuple(session_data[i:i + length])
-                if pattern in self.pattern_store and self.pattern_store[pattern]["source"] == "user":
-                    continue  # Don't overwrite user-submitted patterns
-                self.pattern_store[pattern]["count"] += 1
-                self.pattern_store[pattern]["last_seen"] = len(session_data)
-                self.pattern_store[pattern]["age"] = 0
-                self.pattern_store[pattern]["source"] = "engine"
+        """Count the n-grams ending at results appended since the last call.
 
-        self.decay_patterns()
+        Only new results are scanned, so a click costs O(MAX_PATTERN_LENGTH)
+        regardless of session length. A session shorter than what was already
+        processed is treated as a fresh session.
+        """
+        while True:
+            self._ensure_shards(self._shards_for_new_results(session_data))
+            with self._lock:
+                if self._shards_for_new_results(session_data) - self._loaded_shards:
+                    continue  # Another update moved _processed meanwhile
+                if len(session_data) < self._processed:
+                    self._processed = 0
+                for end in range(self._processed, len(session_data)):
+                    self._record_ngrams_ending_at(session_data, end)
+                self._processed = len(session_data)
+
+                self.decay_patterns()
+                break
         self._save_engine_patterns()
 
+    def _shards_for_new_results(self, session_data):
+        if len(self._loaded_shards) == len(ALL_SHARDS):
+            return set()
+        start = 0 if len(session_data) < self._processed else self._processed
+        return {
+            shard_of(pattern)
+            for end in range(start, len(session_data))
+            for _, pattern in suffix_keys(session_data, end, MIN_PATTERN_LENGTH, MAX_PATTERN_LENGTH)
+        }
+
+    def scan_patterns(self, session_data):
+        """Batch path: count every n-gram in the session from scratch."""
+        spans = [
+            (i + length, encode_pattern(session_data[i:i + length]))
+            for length in range(MIN_PATTERN_LENGTH, min(MAX_PATTERN_LENGTH, len(session_data)) + 1)
+            for i in range(len(session_data) - length + 1)
+        ]
+        self._ensure_shards(shard_of(pattern) for _, pattern in spans)
+        with self._lock:
+            for end, pattern in spans:
+                if pattern in self.pattern_store and self.pattern_store[pattern].source == "user":
+                    continue  # Don't overwrite user-submitted patterns
+                self._touch(pattern, end)
+            self._processed = len(session_data)
+
+    def _record_ngrams_ending_at(self, session_data, end):
+        for _, pattern in suffix_keys(session_data, end, MIN_PATTERN_LENGTH, MAX_PATTERN_LENGTH):
+            if pattern in self.pattern_store and self.pattern_store[pattern].source == "user":
+                continue  # Don't overwrite user-submitted patterns
+            self._touch(pattern, end + 1)
+
+    def _touch(self, pattern, last_seen):
+        """Bring a pattern's count up to the current tick and count one more hit."""
+        is_new = pattern not in self.pattern_store
+        data = self.pattern_store[pattern]
+        data.count = self.get_count(pattern) + 1
+        data.last_seen = last_seen
+        data.source = "engine"
+        self._dirty.add(pattern)
+        if is_new:
+            self.suffix_index.add(pattern)
+            if not self._user_patterns_loaded:
+                self._local_only.add(pattern)
+        if is_new or data.tick != self._tick:
+            data.tick = self._tick
+            heapq.heappush(self._expiry, (self._tick, pattern))
+
     def decay_patterns(self):
-        for pattern in list(self.pattern_store):
-            if self.pattern_store[pattern]["source"] == "user":
-                continue
-            self.pattern_store[pattern]["age"] += 1
-            self.pattern_store[pattern]["count"] *= PATTERN_DECAY_RATE
-            if self.pattern_store[pattern]["age"] > PATTERN_MAX_AGE:
-                del self.pattern_store[pattern]
+        """Advance the decay tick and drop engine patterns older than PATTERN_MAX_AGE.
+
+        Counts are not rewritten here; only heap entries that reached the age
+        limit are visited, so the cost tracks the patterns touched.
+        """
+        with self._lock:
+            self._tick += 1
+            while self._expiry and self._tick - self._expiry[0][0] > PATTERN_MAX_AGE:
+                tick, pattern = heapq.heappop(self._expiry)
+                data = self.pattern_store.get(pattern)
+                if data is not None and data.source == "engine" and data.tick == tick:
+                    del self.pattern_store[pattern]
+                    self.suffix_index.discard(pattern)
+                    self._dirty.add(pattern)
+
+    def get_count(self, pattern):
+        """Return the decayed count of a packed pattern key at the current tick."""
+        with self._lock:
+            data = self.pattern_store.get(pattern)
+            if data is None:
+                return 0
+            if data.source == "user":
+                return data.count
+            return data.count * PATTERN_DECAY_RATE ** (self._tick - data.tick)
+
+    def get_age(self, pattern):
+        with self._lock:
+            data = self.pattern_store.get(pattern)
+            if data is None or data.source == "user":
+                return 0
+            return self._tick - data.tick
+
+    def continuations(self, session_data):
+        """Return [(context_length, {outcome: decayed count})] for every stored
+        pattern whose context matches the session tail, shortest context first.
+
+        Runs in O(MAX_PATTERN_LENGTH) regardless of the store size.
+        """
+        self._ensure_shards(history_shards(session_data, MIN_PATTERN_LENGTH - 1))
+        with self._lock:
+            return [
+                (depth, {SuffixIndex.outcome_symbol(code): self.get_count(key) for code, key in outcomes.items()})
+                for depth, outcomes in self.suffix_index.match(session_data, MAX_PATTERN_LENGTH - 1)
+            ]
 
     def _save_engine_patterns(self):
-        """Upload engine-learned patterns to Firebase."""
-        to_store = {}
-        for pattern, data in self.pattern_store.items():
-            if data["source"] == "engine":
-                key = ''.join(pattern)  # Serialize tuple
-                to_store[key] = {
-                    "count": data["count"],
-                    "last_seen": data["last_seen"],
-                    "age": data["age"]
-                }
-        upload_engine_patterns(to_store)
+        """Schedule a debounced upload of the patterns changed since the last sync.
+
+        Each call restarts the quiet period, so a burst of clicks becomes one
+        write, but no change waits longer than SYNC_MAX_DELAY_SECONDS.
+        """
+        with self._lock:
+            if not self._dirty and not self._legacy_keys:
+                return
+            now = time.monotonic()
+            if self._dirty_since is None:
+                self._dirty_since = now
+            delay = min(SYNC_DEBOUNCE_SECONDS, max(0.0, self._dirty_since + SYNC_MAX_DELAY_SECONDS - now))
+            self._schedule_flush(delay)
+
+    def _schedule_flush(self, delay):
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+            self._flush_timer = threading.Timer(delay, self._flush_in_background)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _flush_in_background(self):
+        try:
+            self.flush_engine_patterns()
+        except Exception:
+            logger.warning("Engine pattern sync failed; retrying in the background", exc_info=True)
+
+    def flush_engine_patterns(self):
+        """Upload changed engine patterns to Firebase as one multi-path update.
+
+        On failure the changes are kept and a retry is scheduled with
+        exponential backoff, so they are not left waiting for the next click.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                dirty, self._dirty = self._dirty, set()
+                legacy_keys, self._legacy_keys = self._legacy_keys, set()
+                self._dirty_since = None
+                updates = {key: None for key in legacy_keys}
+                for pattern in dirty:
+                    data = self.pattern_store.get(pattern)
+                    key = f"{shard_of(pattern)}/{key_to_string(pattern)}"
+                    if data is None or data.source == "user":
+                        updates[key] = None  # Expired, or handed back to a user pattern
+                    elif data.source == "engine":
+                        updates[key] = {
+                            "count": data.count,
+                            "last_seen": data.last_seen,
+                            "tick": data.tick
+                        }
+                tick = self._tick
+            if not updates:
+                return
+            try:
+                update_engine_patterns(updates, tick)
+            except Exception:
+                with self._lock:
+                    self._dirty |= dirty
+                    self._legacy_keys |= legacy_keys
+                    if self._dirty_since is None:
+                        self._dirty_since = time.monotonic()
+                    self._schedule_flush(self._retry_delay)
+                    self._retry_delay = min(self._retry_delay * 2, SYNC_RETRY_MAX_SECONDS)
+                raise
+            with self._lock:
+                self._retry_delay = SYNC_DEBOUNCE_SECONDS
+                migrated = legacy_keys and not self._legacy_keys
+            if migrated:
+                mark_engine_patterns_sharded()
 
     def get_common_patterns(self):
-        sorted_patterns = sorted(self.pattern_store.items(), key=lambda x: -x[1]["count"])
-        return [pat for pat, data in sorted_patterns if data["count"] > 1]
+        with self._lock:
+            counts = {pattern: self.get_count(pattern) for pattern in self.pattern_store}
+        sorted_patterns = sorted(counts.items(), key=lambda x: -x[1])
+        return [tuple(key_to_string(pat)) for pat, count in sorted_patterns if count > 1]
@@ -1,23 +1,54 @@
 
 # pattern_tracking.py
 
+from bisect import bisect_left, insort
 from collections import defaultdict
 import math
 
+# Confidence saturates at 1.0 once log10(count + 1) reaches 1, i.e. count >= 9
+CONFIDENCE_SATURATION_COUNT = 9
+CONFIDENCE_TABLE = [min(1.0, math.log(c + 1) / math.log(10)) for c in range(CONFIDENCE_SATURATION_COUNT + 1)]
+FIRST_SEEN_CONFIDENCE = 0.1
+
 class PatternTracker:
     def __init__(self):
         self.patterns = defaultdict(lambda: {"count": 0, "confidence": 0.0, "last_seen": 0})
+        # Patterns bucketed by confidence value; confidence only takes a few
+        # distinct values, so threshold queries read whole buckets.
+        self._buckets = {}
+        self._levels = []  # Sorted confidence values that have a bucket
 
     def record_pattern(self, pattern, session_id, result):
         if pattern in self.patterns:
-            self.patterns[pattern]["count"] += 1
-            self.patterns[pattern]["last_seen"] = session_id
-            self.patterns[pattern]["confidence"] = self._calculate_confidence(self.patterns[pattern]["count"])
+            data = self.patterns[pattern]
+            self._unindex(pattern, data["confidence"])
+            data["count"] += 1
+            data["last_seen"] = session_id
+            data["confidence"] = self._calculate_confidence(data["count"])
         else:
-            self.patterns[pattern] = {"count": 1, "confidence": 0.1, "last_seen": session_id}
+            data = self.patterns[pattern] = {"count": 1, "confidence": FIRST_SEEN_CONFIDENCE, "last_seen": session_id}
+        self._index(pattern, data["confidence"])
 
     def _calculate_confidence(self, count):
-        return min(1.0, math.log(count + 1) / math.log(10))
+        if count <= CONFIDENCE_SATURATION_COUNT:
+            return CONFIDENCE_TABLE[count]
+        return 1.0
+
+    def _index(self, pattern, confidence):
+        bucket = self._buckets.get(confidence)
+        if bucket is None:
+            bucket = self._buckets[confidence] = {}
+            insort(self._levels, confidence)
+        bucket[pattern] = None
+
+    def _unindex(self, pattern, confidence):
+        bucket = self._buckets.get(confidence)
+        if bucket is not None:
+            bucket.pop(pattern, None)
 
     def get_confident_patterns(self, threshold=0.75):
-        return {p: d for p, d in self.patterns.items() if d["confidence"] >= threshold}
+        confident = {}
+        for level in self._levels[bisect_left(self._levels, threshold):]:
+            for pattern in self._buckets[level]:
+                confident[pattern] = self.patterns[pattern]
+        return confident
@@ -1,16 +1,90 @@
 # pattern_utils.py
 
+import sys
+
 def invert_pattern(pattern):
     return ["W" if p == "L" else "L" if p == "W" else p for p in pattern]
 
 def rotate_pattern(pattern, positions=1):
     return pattern[positions:] + pattern[:positions]
 
+def pattern_shape(pattern):
+    return "".join("W" if x == "W" else "L" if x == "L" else "M" for x in pattern)
+
 def find_shape_matches(candidate, pattern_list):
-    shape = "".join("W" if x == "W" else "L" if x == "L" else "M" for x in candidate)
+    shape = pattern_shape(candidate)
     matches = []
     for pattern in pattern_list:
-        target_shape = "".join("W" if x == "W" else "L" if x == "L" else "M" for x in pattern)
-        if shape == target_shape:
+        if shape == pattern_shape(pattern):
             matches.append(pattern)
-    return matches
\ No newline at end of file
+    return matches
+
+
+class ShapeIndex:
+    """Shape -> patterns index maintained incrementally, for repeated shape lookups.
+
+    Never drops patterns on its own: with max_patterns set, adding a new
+    pattern past the bound raises OverflowError so lookups stay complete.
+    memory_usage() reports the current footprint.
+    """
+
+    def __init__(self, patterns=(), max_patterns=None):
+        self.max_patterns = max_patterns
+        self._by_shape = {}  # shape -> {pattern key: pattern}
+        self._shapes = {}    # pattern key -> shape
+        self._entry_bytes = 0
+        for pattern in patterns:
+            self.add(pattern)
+
+    @staticmethod
+    def _key(pattern):
+        return pattern if isinstance(pattern, (str, tuple)) else tuple(pattern)
+
+    def add(self, pattern):
+        key = self._key(pattern)
+        if key in self._shapes:
+            return
+        if self.max_patterns is not None and len(self._shapes) >= self.max_patterns:
+            raise OverflowError(f"ShapeIndex is full ({self.max_patterns} patterns)")
+        shape = pattern_shape(pattern)
+        bucket = self._by_shape.get(shape)
+        if bucket is None:
+            shape = sys.intern(shape)
+            bucket = self._by_shape[shape] = {}
+            self._entry_bytes += sys.getsizeof(shape)
+        bucket[key] = pattern
+        self._shapes[key] = shape
+        self._entry_bytes += sys.getsizeof(key)
+
+    def remove(self, pattern):
+        key = self._key(pattern)
+        if key in self._shapes:
+            self._remove_key(key)
+
+    def _remove_key(self, key):
+        shape = self._shapes.pop(key)
+        bucket = self._by_shape[shape]
+        del bucket[key]
+        self._entry_bytes -= sys.getsizeof(key)
+        if not bucket:
+            del self._by_shape[shape]
+            self._entry_bytes -= sys.getsizeof(shape)
+
+    def find_shape_matches(self, candidate):
+        bucket = self._by_shape.get(pattern_shape(candidate))
+        return list(bucket.values()) if bucket else []
+
+    def __len__(self):
+        return len(self._shapes)
+
+    def memory_usage(self):
+        """Approximate bytes held by the index (containers, keys and shape strings)."""
+        container_bytes = sys.getsizeof(self._by_shape) + sys.getsizeof(self._shapes)
+        container_bytes += sum(sys.getsizeof(bucket) for bucket in self._by_shape.values())
+        return {
+            "patterns": len(self._shapes),
+            "shapes": len(self._by_shape),
+            "max_patterns": self.max_patterns,
+            "full": self.max_patterns is not None and len(self._shapes) >= self.max_patterns,
+            "bytes": container_bytes + self._entry_bytes
+        }
@@ -1,17 +1,19 @@
 # Handles pattern matching, inversion, and rotation for crafted result sequences
 
-def rotate_pattern(pattern, offset):
-    return pattern[offset:] + pattern[:offset]
+from ..match_engine import (
+    rotate_pattern,
+    invert_pattern,
+    generate_pattern_variants,
+    least_rotation,
+    canonical_pattern,
+    VariantIndex
+)
 
-def invert_pattern(pattern):
-    inversion = {'W': 'L', 'L': 'W'}
-    return ''.join(inversion.get(char, char) for char in pattern)
-
-def generate_pattern_variants(pattern):
-    variants = set()
-    variants.add(pattern)
-    variants.add(invert_pattern(pattern))
-    for i in range(1, len(pattern)):
-        variants.add(rotate_pattern(pattern, i))
-        variants.add(invert_pattern(rotate_pattern(pattern, i)))
-    return variants
\ No newline at end of file
+__all__ = [
+    "rotate_pattern",
+    "invert_pattern",
+    "generate_pattern_variants",
+    "least_rotation",
+    "canonical_pattern",
+    "VariantIndex"
+]
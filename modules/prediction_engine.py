@@ -1,6 +1,15 @@
-def predict_next_outcome(session_data, pattern_model, material_distribution, gear_type):
+def predict_next_outcome(session_data, pattern_model, material_distribution, gear_type, pattern_manager=None):
     if not session_data:
         return "P", 0.0
+    if pattern_manager is not None:
+        # Longest stored context matching the session tail wins
+        matches = pattern_manager.continuations(session_data)
+        if matches:
+            distribution = matches[-1][1]
+            total = sum(distribution.values())
+            if total > 0:
+                outcome, count = max(distribution.items(), key=lambda x: x[1])
+                return outcome, count / total
     pattern = max(pattern_model.items(), key=lambda x: x[1]["confidence"], default=(None, None))
     if pattern[0] is None:
         return "P", 0.0
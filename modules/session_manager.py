@@ -1,23 +1,112 @@
+import logging
+import threading
 import streamlit as st
 from modules.session_tracker import SessionTracker
-from modules.utils.firebase_utils import upload_session_data, retrieve_session_data
+from modules.utils.firebase_utils import (
+    append_session_results,
+    reserve_session_indices,
+    retrieve_session_data_async
+)
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_USER = "default"
+SESSION_FLUSH_DELAY_SECONDS = 0.5
+SESSION_RETRY_MAX_SECONDS = 30.0  # Backoff cap when a flush keeps failing
+
+class SessionWriteBuffer:
+    """Write-ahead buffer of results not yet appended to sessions/{user_id}.
+
+    A background flush claims the next indices from the shared per-user
+    counter and writes the pending results in one multi-path update, so a
+    click uploads only its own result. Failed flushes keep their results
+    (and any indices already claimed) and retry with exponential backoff.
+    """
+
+    def __init__(self, user_id, next_index):
+        self.user_id = user_id
+        self.next_index = next_index  # Lowest index this buffer may claim
+        self._pending = []  # Results without an index, in submission order
+        self._claimed = {}  # index -> result, claimed but not written yet
+        self._retry_delay = SESSION_FLUSH_DELAY_SECONDS
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # Keeps flushes ordered
+        self._flush_timer = None
+
+    def append(self, result):
+        with self._lock:
+            self._pending.append(result)
+            if self._flush_timer is None:
+                self._schedule_flush(SESSION_FLUSH_DELAY_SECONDS)
+
+    def _schedule_flush(self, delay):
+        self._flush_timer = threading.Timer(delay, self._flush_in_background)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.warning("Session results for %s not saved; retrying in the background",
+                           self.user_id, exc_info=True)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                pending, self._pending = self._pending, []
+            try:
+                if pending:
+                    start = reserve_session_indices(self.user_id, len(pending), self.next_index)
+                    self._claimed.update((start + i, result) for i, result in enumerate(pending))
+                    self.next_index = start + len(pending)
+                    pending = []
+                if self._claimed:
+                    append_session_results(self.user_id, self._claimed)
+                    self._claimed = {}
+            except Exception:
+                with self._lock:
+                    self._pending = pending + self._pending
+                    if self._flush_timer is not None:
+                        self._flush_timer.cancel()
+                    self._schedule_flush(self._retry_delay)
+                    self._retry_delay = min(self._retry_delay * 2, SESSION_RETRY_MAX_SECONDS)
+                raise
+            with self._lock:
+                self._retry_delay = SESSION_FLUSH_DELAY_SECONDS
 
 def initialize_session(user_id=DEFAULT_USER):
-    if "tracker" not in st.session_state:
-        tracker = SessionTracker()
-        tracker.switch_user(user_id)
-        stored_data = retrieve_session_data(user_id=user_id)
-        if stored_data:
-            for result in stored_data:
-                tracker.add_result(result)
-        st.session_state.tracker = tracker
+    """Start loading the stored session without blocking the first render; the
+    tracker is built once the read is done, or by the first submission."""
+    if "tracker" not in st.session_state and "session_loading" not in st.session_state:
         st.session_state.user_id = user_id
+        st.session_state.session_loading = retrieve_session_data_async(user_id=user_id)
+    _finish_session_loading()
+
+def _finish_session_loading(wait=False):
+    loading = st.session_state.get("session_loading")
+    if loading is None or not (wait or loading.done()):
+        return
+    del st.session_state["session_loading"]  # A failed read is retried on the next run
+    stored_data, next_index = loading.result()
+    user_id = st.session_state.user_id
+    tracker = SessionTracker()
+    tracker.switch_user(user_id)
+    for result in stored_data:
+        tracker.add_result(result)
+    st.session_state.tracker = tracker
+    st.session_state.session_writer = SessionWriteBuffer(user_id, next_index)
 
 def handle_result_submission(result):
+    _finish_session_loading(wait=True)
     if "tracker" in st.session_state:
         tracker = st.session_state.tracker
         tracker.add_result(result)
-        user_id = st.session_state.get("user_id", DEFAULT_USER)
-        upload_session_data(user_id=user_id, session_data=tracker.get_session_results())
\ No newline at end of file
+        writer = st.session_state.get("session_writer")
+        if writer is None:
+            user_id = st.session_state.get("user_id", DEFAULT_USER)
+            writer = st.session_state.session_writer = SessionWriteBuffer(user_id, tracker.session_length() - 1)
+        writer.append(result)
@@ -0,0 +1,78 @@
+# suffix_index.py
+# Reversed trie over packed pattern keys (see compact_patterns). A pattern is
+# split into a context (all but the last symbol) and an outcome; the context is
+# inserted back to front, so walking the live session from its newest result
+# visits every stored context that is a suffix of the session.
+
+from .compact_patterns import CODE_SYMBOLS, symbol_code
+
+class _Node:
+    __slots__ = ("children", "outcomes")
+
+    def __init__(self):
+        self.children = {}
+        self.outcomes = {}  # outcome code -> pattern key
+
+
+class SuffixIndex:
+    def __init__(self):
+        self._root = _Node()
+        self.size = 0
+
+    def add(self, key):
+        if key < 4:
+            raise ValueError(f"Pattern key {key} has no outcome symbol")
+        node = self._root
+        context = key >> 2
+        while context > 1:
+            code = context & 3
+            child = node.children.get(code)
+            if child is None:
+                child = node.children[code] = _Node()
+            node = child
+            context >>= 2
+        if (key & 3) not in node.outcomes:
+            self.size += 1
+        node.outcomes[key & 3] = key
+
+    def discard(self, key):
+        path = []
+        node = self._root
+        context = key >> 2
+        while context > 1:
+            code = context & 3
+            path.append((node, code))
+            node = node.children.get(code)
+            if node is None:
+                return
+            context >>= 2
+        if node.outcomes.pop(key & 3, None) is None:
+            return
+        self.size -= 1
+        # Prune nodes left without outcomes or children
+        while path and not node.outcomes and not node.children:
+            parent, code = path.pop()
+            del parent.children[code]
+            node = parent
+
+    def match(self, history, max_context=None):
+        """Return [(context_length, {outcome code: pattern key})] for stored contexts
+        that are suffixes of history, shortest first. Cost is O(max context length)."""
+        matches = []
+        node = self._root
+        depth = 0
+        limit = len(history) if max_context is None else min(max_context, len(history))
+        while True:
+            if node.outcomes:
+                matches.append((depth, node.outcomes))
+            if depth == limit:
+                break
+            node = node.children.get(symbol_code(history[-1 - depth]))
+            if node is None:
+                break
+            depth += 1
+        return matches
+
+    @staticmethod
+    def outcome_symbol(code):
+        return CODE_SYMBOLS[code]
@@ -1,15 +1,54 @@
 
 # Utility functions for data transformation and processing
 
+import numpy as np
+
+def normalize_distributions(distributions, axis=-1, decimals=None):
+    """Normalize a stack of distributions along axis; all-zero slices stay zero."""
+    values = np.asarray(distributions, dtype=np.float64)
+    totals = values.sum(axis=axis, keepdims=True)
+    normalized = np.divide(values, totals, out=np.zeros_like(values), where=totals != 0)
+    return normalized if decimals is None else np.round(normalized, decimals)
+
+def average_distribution_array(distributions, axis=0, decimals=None):
+    """Sum a 2-D stack along axis and normalize the result in one call."""
+    return normalize_distributions(np.asarray(distributions, dtype=np.float64).sum(axis=axis), decimals=decimals)
+
+class DistributionAccumulator:
+    """Running sum of distributions; fold in single rows or chunks without keeping them."""
+
+    def __init__(self, length=None):
+        self.summed = None if length is None else np.zeros(length)
+        self.count = 0
+
+    def add(self, distribution):
+        values = np.asarray(distribution, dtype=np.float64)
+        if self.summed is None:
+            self.summed = np.zeros(len(values))
+        self.summed += values
+        self.count += 1
+
+    def add_many(self, distributions):
+        values = np.asarray(distributions, dtype=np.float64)
+        if not len(values):
+            return
+        if self.summed is None:
+            self.summed = np.zeros(values.shape[1])
+        self.summed += values.sum(axis=0)
+        self.count += len(values)
+
+    def average(self, decimals=None):
+        if self.summed is None:
+            return np.zeros(0)
+        return normalize_distributions(self.summed, decimals=decimals)
+
 def normalize_distribution(distribution):
     total = sum(distribution)
     if total == 0:
         return [0] * len(distribution)
-    return [round(val / total, 6) for val in distribution]
+    return [round(val, 6) for val in normalize_distributions(distribution).tolist()]
 
 def average_distributions(distributions):
-    if not distributions:
+    if not len(distributions):
         return []
-    length = len(distributions[0])
-    summed = [sum(d[i] for d in distributions) for i in range(length)]
-    return normalize_distribution(summed)
+    return normalize_distribution(np.asarray(distributions, dtype=np.float64).sum(axis=0).tolist())
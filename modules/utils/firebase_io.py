@@ -0,0 +1,273 @@
+# firebase_io.py
+# Non-blocking facade over the realtime database. Reads and writes run on a
+# bounded thread pool and return futures, so the Streamlit script thread only
+# blocks when it actually needs a value.
+
+import argparse
+import copy
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_DELAY_SECONDS = 0.5
+
+
+def _firebase_reference(path):
+    from .firebase_utils import initialize_firebase
+    from firebase_admin import db
+    initialize_firebase()
+    return db.reference(path)
+
+
+class FirebaseIO:
+    def __init__(self, reference=None, max_workers=DEFAULT_MAX_WORKERS,
+                 max_retries=DEFAULT_MAX_RETRIES, retry_delay=DEFAULT_RETRY_DELAY_SECONDS):
+        self.reference = reference or _firebase_reference
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="firebase-io")
+        self._inflight = {}  # path -> future of a pending read
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Read path in the background; concurrent reads of one path share a future."""
+        with self._lock:
+            future = self._inflight.get(path)
+            if future is not None:
+                return future
+            future = self._inflight[path] = self._executor.submit(self._read, path)
+        future.add_done_callback(lambda f: self._forget(path, f))
+        return future
+
+    def _read(self, path):
+        return self.reference(path).get()
+
+    def _forget(self, path, future):
+        with self._lock:
+            if self._inflight.get(path) is future:
+                del self._inflight[path]
+
+    def set(self, path, value):
+        return self._executor.submit(self._write, "set", path, value)
+
+    def update(self, path, values):
+        return self._executor.submit(self._write, "update", path, values)
+
+    def transaction(self, path, transaction_update):
+        return self._executor.submit(self._write, "transaction", path, transaction_update)
+
+    def set_and_forget(self, path, value):
+        """Write without waiting; a final failure is logged. Returns the future."""
+        return self._log_failure(self.set(path, value), path)
+
+    def update_and_forget(self, path, values):
+        return self._log_failure(self.update(path, values), path)
+
+    def _write(self, method, path, value):
+        """Run a write, retrying up to max_retries times with exponential backoff."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return getattr(self.reference(path), method)(value)
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self.retry_delay * 2 ** attempt)
+
+    @staticmethod
+    def _log_failure(future, path):
+        def report(f):
+            if f.exception() is not None:
+                logger.error("Firebase write to %s failed after retries", path, exc_info=f.exception())
+        future.add_done_callback(report)
+        return future
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+_default_io = None
+_default_io_lock = threading.Lock()
+
+
+def get_firebase_io():
+    """Shared FirebaseIO for the app's realtime database."""
+    global _default_io
+    with _default_io_lock:
+        if _default_io is None:
+            _default_io = FirebaseIO()
+        return _default_io
+
+
+class InMemoryDatabase:
+    """Offline stand-in for the realtime database: a nested dict with the same
+    reference(path).get/set/update/transaction surface and optional per-call latency."""
+
+    def __init__(self, latency=0.0, failures=0):
+        self.root = {}
+        self.latency = latency
+        self.failures = failures  # Writes that fail before the next one succeeds
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def reference(self, path="/"):
+        return InMemoryReference(self, [part for part in path.split("/") if part])
+
+    def _call(self, fail=False):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            if fail and self.failures:
+                self.failures -= 1
+                raise ConnectionError("Simulated database failure")
+
+
+def _to_tree(value):
+    """Store value as the realtime database does: lists become index-keyed
+    objects, and None children and empty objects are dropped (None = delete)."""
+    if isinstance(value, (list, tuple)):
+        value = {str(i): child for i, child in enumerate(value)}
+    if isinstance(value, dict):
+        tree = {}
+        for key, child in value.items():
+            child = _to_tree(child)
+            if child is not None:
+                tree[str(key)] = child
+        return tree or None
+    return copy.deepcopy(value)
+
+
+def _from_tree(node):
+    """Read back a stored node; objects whose keys look like array indices come
+    back as lists with None holes, as the realtime database returns them."""
+    if not isinstance(node, dict):
+        return copy.deepcopy(node)
+    children = {key: _from_tree(child) for key, child in node.items()}
+    if not children:
+        return None  # Only the root can be empty
+    if all(key.isdigit() for key in children):
+        indices = [int(key) for key in children]
+        if 2 * len(indices) > max(indices) + 1:
+            array = [None] * (max(indices) + 1)
+            for index, child in zip(indices, children.values()):
+                array[index] = child
+            return array
+    return children
+
+
+class InMemoryReference:
+    def __init__(self, database, parts):
+        self.database = database
+        self.parts = parts
+
+    def get(self):
+        self.database._call()
+        with self.database._lock:
+            node = self.database.root
+            for part in self.parts:
+                if not isinstance(node, dict) or part not in node:
+                    return None
+                node = node[part]
+            return _from_tree(node)
+
+    def set(self, value):
+        self.database._call(fail=True)
+        with self.database._lock:
+            self._assign(self.parts, _to_tree(value))
+
+    def update(self, values):
+        self.database._call(fail=True)
+        with self.database._lock:
+            for key, value in values.items():
+                self._assign(self.parts + [part for part in key.split("/") if part], _to_tree(value))
+
+    def transaction(self, transaction_update):
+        """Atomically replace the value with transaction_update(current); returns the new value."""
+        self.database._call(fail=True)
+        with self.database._lock:
+            node = self.database.root
+            for part in self.parts:
+                node = node.get(part) if isinstance(node, dict) else None
+            value = transaction_update(_from_tree(node))
+            self._assign(self.parts, _to_tree(value))
+            return value
+
+    def _assign(self, parts, value):
+        if not parts:
+            self.database.root = value if isinstance(value, dict) else {}
+            return
+        node = self.database.root
+        trail = []
+        for part in parts[:-1]:
+            child = node.get(part)
+            if not isinstance(child, dict):
+                if value is None:
+                    return
+                child = node[part] = {}
+            trail.append((node, part))
+            node = child
+        if value is None:
+            node.pop(parts[-1], None)
+            # Prune parents left empty, as the realtime database does
+            for parent, part in reversed(trail):
+                if parent[part]:
+                    break
+                del parent[part]
+        else:
+            node[parts[-1]] = value
+
+
+def benchmark(reads=200, paths=10, latency=0.02, max_workers=DEFAULT_MAX_WORKERS):
+    """Compare blocking reads with the facade against an InMemoryDatabase with latency."""
+    database = InMemoryDatabase(latency=latency)
+    for i in range(paths):
+        database.reference(f"bench/{i}").set({"value": i})
+    requests = [f"bench/{i % paths}" for i in range(reads)]
+
+    database.calls = 0
+    start = time.perf_counter()
+    blocking = [database.reference(path).get() for path in requests]
+    blocking_seconds = time.perf_counter() - start
+    blocking_calls = database.calls
+
+    io = FirebaseIO(database.reference, max_workers=max_workers)
+    database.calls = 0
+    start = time.perf_counter()
+    futures = [io.get(path) for path in requests]
+    facade = [future.result() for future in futures]
+    facade_seconds = time.perf_counter() - start
+    facade_calls = database.calls
+
+    start = time.perf_counter()
+    for i in range(reads):
+        io.set_and_forget(f"bench_writes/{i}", i)
+    enqueue_seconds = time.perf_counter() - start
+    io.shutdown()
+
+    assert facade == blocking
+    return {
+        "reads": reads,
+        "blocking_seconds": blocking_seconds,
+        "blocking_calls": blocking_calls,
+        "facade_seconds": facade_seconds,
+        "facade_calls": facade_calls,
+        "write_enqueue_seconds": enqueue_seconds,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark FirebaseIO against an in-memory database")
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--paths", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated seconds per database call")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS)
+    args = parser.parse_args()
+    result = benchmark(args.reads, args.paths, args.latency, args.workers)
+    print(f"blocking: {result['blocking_seconds']:.3f}s, {result['blocking_calls']} calls")
+    print(f"facade:   {result['facade_seconds']:.3f}s, {result['facade_calls']} calls")
+    print(f"{args.reads} fire-and-forget writes enqueued in {result['write_enqueue_seconds'] * 1000:.2f}ms")
@@ -1,46 +1,260 @@
 import streamlit as st
 import firebase_admin
-from firebase_admin import credentials, db
+from firebase_admin import credentials
 import os
 import json
+import hashlib
+import threading
+import time
+from concurrent.futures import Future
+from .firebase_io import get_firebase_io
 
 firebase_app = None
 
+READ_CACHE_TTL_SECONDS = 30.0
+USER_PATTERN_KEY_LENGTH = 20
+ENGINE_LAYOUT_SHARDED = "sharded"  # engine_meta/layout once no flat engine_patterns keys remain
+# Patterns known to be stored remotely; lets repeat submissions skip the write
+_known_user_patterns = set()
+_user_patterns_lock = threading.Lock()
+
+class ReadCache:
+    """TTL cache of raw database reads shared by every rerun and browser session.
+
+    Each local write bumps the cache generation and drops entries on or around
+    the written path; a read that overlapped a write is returned but not
+    stored, so the cache never holds a value older than a local write.
+    Cached values are shared and must be treated as read-only.
+    """
+
+    def __init__(self, ttl=READ_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._entries = {}  # path -> (expires_at, value)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, path, load):
+        """Future of the value at path; on a miss, load() returns the future of a read."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] > now:
+                return _resolved(entry[1])
+            generation = self._generation
+        future = load()
+        def store(f):
+            if f.exception() is None:
+                with self._lock:
+                    if self._generation == generation:
+                        self._entries[path] = (now + self.ttl, f.result())
+        future.add_done_callback(store)
+        return future
+
+    def invalidate(self, path=None):
+        """Drop cached reads of path, its ancestors and its descendants (all if None)."""
+        with self._lock:
+            self._generation += 1
+            if path is None:
+                self._entries.clear()
+                return
+            path = path.strip("/")
+            for cached in list(self._entries):
+                if (cached == path or path.startswith(cached + "/") or cached.startswith(path + "/")
+                        or not cached):
+                    del self._entries[cached]
+
+_read_cache = ReadCache()
+
+def _resolved(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+def _then(future, transform):
+    """Future of transform(result of future)."""
+    chained = Future()
+    def done(f):
+        try:
+            chained.set_result(transform(f.result()))
+        except Exception as e:
+            chained.set_exception(e)
+    future.add_done_callback(done)
+    return chained
+
+@st.cache_resource
+def get_firebase_app():
+    """Process-wide Firebase app, created once per server process."""
+    if firebase_admin._apps:
+        return firebase_admin.get_app()
+    try:
+        # Try loading from Streamlit secrets (for Streamlit Cloud)
+        cred = credentials.Certificate(st.secrets["firebase"])
+    except Exception:
+        # Fallback to local credentials file
+        with open("firebase_credentials.json") as f:
+            cred_dict = json.load(f)
+        cred = credentials.Certificate(cred_dict)
+
+    return firebase_admin.initialize_app(cred, {
+        'databaseURL': "https://aureusengine-433eb-default-rtdb.firebaseio.com/"
+    })
+
 def initialize_firebase():
     global firebase_app
-    if not firebase_admin._apps:
-        try:
-            # Try loading from Streamlit secrets (for Streamlit Cloud)
-            cred = credentials.Certificate(st.secrets["firebase"])
-        except Exception:
-            # Fallback to local credentials file
-            with open("firebase_credentials.json") as f:
-                cred_dict = json.load(f)
-            cred = credentials.Certificate(cred_dict)
-
-        firebase_app = firebase_admin.initialize_app(cred, {
-            'databaseURL': "https://aureusengine-433eb-default-rtdb.firebaseio.com/"
-        })
+    if firebase_app is None:
+        firebase_app = get_firebase_app()
+
+def cached_read_async(path):
+    """Future of path's value through the shared TTL cache.
+
+    Misses go through the FirebaseIO pool, so concurrent misses on one path
+    from different reruns or browser sessions share a single request.
+    """
+    return _read_cache.get(path, lambda: get_firebase_io().get(path))
+
+def cached_read(path):
+    return cached_read_async(path).result()
+
+def invalidate_cache(path=None):
+    _read_cache.invalidate(path)
+
+def _invalidate_when_done(future, *paths):
+    """Drop cached reads of paths now and again once the write lands, so a read
+    that raced the write is not kept."""
+    def invalidate(_):
+        for path in paths:
+            invalidate_cache(path)
+    invalidate(future)
+    future.add_done_callback(invalidate)
+    return future
 
 def sanitize_pattern(pattern_str):
     return ''.join(c for c in pattern_str.upper() if c in {'W', 'L', 'M'})
 
 def upload_session_data(user_id, session_data):
-    initialize_firebase()
-    ref = db.reference(f"sessions/{user_id}")
-    ref.set(session_data)
+    """Replace sessions/{user_id} in the background; failures are logged."""
+    path = f"sessions/{user_id}"
+    _invalidate_when_done(get_firebase_io().set_and_forget(path, session_data), path)
+
+def append_session_results(user_id, results):
+    """Append {index: result} entries under sessions/{user_id} in one multi-path update."""
+    path = f"sessions/{user_id}"
+    values = {str(index): result for index, result in results.items()}
+    _invalidate_when_done(get_firebase_io().update(path, values), path).result()
+
+def reserve_session_indices(user_id, count, floor=0):
+    """Atomically claim count consecutive result indices for sessions/{user_id}.
+
+    Every browser session writing to the same user goes through one counter,
+    so no two of them hand out the same index. floor is the next free index
+    seen in the stored results, for sessions written before the counter.
+    Returns the first claimed index.
+    """
+    claimed = get_firebase_io().transaction(
+        f"session_meta/{user_id}/next_index",
+        lambda current: max(int(current or 0), floor) + count
+    ).result()
+    return int(claimed) - count
+
+def _session_results(data):
+    if not data:
+        return [], 0
+    # Index-keyed children come back as a list, or as a dict if the indices are sparse
+    if isinstance(data, dict):
+        indices = sorted(int(key) for key in data if data[key] is not None)
+        return [data[str(index)] for index in indices], (indices[-1] + 1 if indices else 0)
+    return [result for result in data if result is not None], len(data)
+
+def retrieve_session_data_async(user_id):
+    """Future of (results in index order, next free index) for sessions/{user_id}.
+
+    Holes and deleted entries are skipped in the results, but the next index
+    is the highest stored index + 1, so new results never overwrite old ones.
+    """
+    return _then(cached_read_async(f"sessions/{user_id}"), _session_results)
 
 def retrieve_session_data(user_id):
-    initialize_firebase()
-    ref = db.reference(f"sessions/{user_id}")
-    data = ref.get()
-    return data if data else []
+    return retrieve_session_data_async(user_id).result()
+
+def user_pattern_key(sanitized):
+    """Deterministic database key for a sanitized user pattern."""
+    return hashlib.sha1(sanitized.encode("ascii")).hexdigest()[:USER_PATTERN_KEY_LENGTH]
 
 def upload_user_pattern(pattern_str):
-    initialize_firebase()
+    """Store a user pattern under its hashed key: one idempotent background write,
+    no list download."""
     sanitized = sanitize_pattern(pattern_str)
-    ref = db.reference("user_patterns")
-    patterns = ref.get() or []
-    if sanitized not in patterns:
-        patterns.append(sanitized)
-        ref.set(patterns)
\ No newline at end of file
+    if not sanitized:
+        return
+    with _user_patterns_lock:
+        if sanitized in _known_user_patterns:
+            return
+    def remember(future):
+        if future.exception() is None:
+            with _user_patterns_lock:
+                _known_user_patterns.add(sanitized)
+    future = get_firebase_io().set_and_forget(f"user_patterns/{user_pattern_key(sanitized)}", sanitized)
+    _invalidate_when_done(future, "user_patterns").add_done_callback(remember)
+
+def _user_patterns(data):
+    if not data:
+        return []
+    values = data.values() if isinstance(data, dict) else data
+    patterns = list(dict.fromkeys(p for p in values if p))
+    with _user_patterns_lock:
+        _known_user_patterns.update(patterns)
+    return patterns
+
+def retrieve_user_patterns_async():
+    """Future of the unique user patterns, from keyed entries and/or the legacy list layout."""
+    return _then(cached_read_async("user_patterns"), _user_patterns)
+
+def retrieve_user_patterns():
+    return retrieve_user_patterns_async().result()
+
+def retrieve_engine_patterns_async():
+    """Future of everything under engine_patterns: {shard: {pattern: data}}, plus
+    any legacy flat {pattern: data} entries."""
+    return _then(cached_read_async("engine_patterns"), lambda data: dict(data or {}))
+
+def retrieve_engine_patterns():
+    return retrieve_engine_patterns_async().result()
+
+def retrieve_engine_shard_async(shard):
+    """Future of {pattern: data} for one engine pattern shard."""
+    return _then(cached_read_async(f"engine_patterns/{shard}"), lambda data: dict(data or {}))
+
+def retrieve_engine_shard(shard):
+    return retrieve_engine_shard_async(shard).result()
+
+def retrieve_engine_layout_async():
+    """Future of engine_meta/layout: ENGINE_LAYOUT_SHARDED, or None while flat
+    legacy entries may remain under engine_patterns."""
+    return cached_read_async("engine_meta/layout")
+
+def mark_engine_patterns_sharded():
+    future = get_firebase_io().set_and_forget("engine_meta/layout", ENGINE_LAYOUT_SHARDED)
+    _invalidate_when_done(future, "engine_meta/layout")
+
+def retrieve_engine_tick_async():
+    return _then(cached_read_async("engine_meta/tick"), lambda tick: int(tick) if tick else 0)
+
+def retrieve_engine_tick():
+    return retrieve_engine_tick_async().result()
+
+def update_engine_patterns(pattern_updates, tick):
+    """Write changed engine patterns ({"shard/pattern": data}) in one multi-path
+    update; None deletes a pattern.
+
+    The shared tick is raised to tick in a transaction and never lowered, so a
+    manager that has seen fewer clicks cannot move it back.
+    """
+    io = get_firebase_io()
+    updates = {f"engine_patterns/{key}": value for key, value in pattern_updates.items()}
+    patterns_written = _invalidate_when_done(io.update("/", updates), "engine_patterns")
+    tick_written = _invalidate_when_done(
+        io.transaction("engine_meta/tick", lambda current: max(int(current or 0), tick)),
+        "engine_meta/tick"
+    )
+    patterns_written.result()
+    tick_written.result()